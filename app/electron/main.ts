@@ -212,134 +212,137 @@ ipcMain.handle('stop-bluetooth-scanning', async () => {
   return { success: true };
 });
 
-ipcMain.handle('save-device-config', async (_event, deviceId: string, config: any) => {
-  return new Promise((resolve, reject) => {
-    const backend = getBackendPath();
-    const python = spawn('python', [
-      backend.scriptPath('save_config.py'), 
-      deviceId, 
-      JSON.stringify(config)
-    ], {
-      cwd: backend.workingDir
-    });
-    
-    let result = '';
-    let error = '';
-
-    python.stdout.on('data', (data) => {
-      result += data.toString();
-    });
-
-    python.stderr.on('data', (data) => {
-      error += data.toString();
-    });
-
-    python.on('close', (code) => {
-      if (code === 0) {
-        try {
-          resolve(JSON.parse(result));
-        } catch {
-          resolve({ success: true });
+// Persistent Python backend for config and hotkey calls (see backend/backend_daemon.py)
+let backendDaemon: any = null;
+let backendOutput = '';
+let nextBackendRequestId = 1;
+// A request that gets no response in time is rejected, so a hung daemon can't leave IPC calls pending forever
+const BACKEND_REQUEST_TIMEOUT_MS = 30000;
+const pendingBackendRequests = new Map<number, {
+  resolve: (value: any) => void;
+  reject: (reason: Error) => void;
+  timer: ReturnType<typeof setTimeout>;
+}>();
+
+function takeBackendRequest(id: number) {
+  const pending = pendingBackendRequests.get(id);
+  if (pending) {
+    pendingBackendRequests.delete(id);
+    clearTimeout(pending.timer);
+  }
+  return pending;
+}
+
+function getBackendDaemon(): any {
+  if (backendDaemon) {
+    return backendDaemon;
+  }
+
+  const backend = getBackendPath();
+  const daemon = spawn(pythonCommand, [backend.scriptPath('backend_daemon.py')], {
+    cwd: backend.workingDir
+  });
+  backendDaemon = daemon;
+
+  daemon.stdout.on('data', (data: Buffer) => {
+    backendOutput += data.toString();
+    const lines = backendOutput.split('\n');
+    backendOutput = lines.pop() || '';
+
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      try {
+        const response = JSON.parse(line);
+        const pending = takeBackendRequest(response.id);
+        if (!pending) {
+          console.log('Backend response without request:', response);
+          continue;
+        }
+        if (response.error !== undefined) {
+          pending.reject(new Error(response.error));
+        } else {
+          pending.resolve(response.result);
         }
-      } else {
-        reject(new Error(error));
+      } catch (e) {
+        console.log('Non-JSON line from backend daemon:', line);
       }
-    });
+    }
   });
-});
 
-ipcMain.handle('load-device-config', async (_event, deviceId: string) => {
-  return new Promise((resolve, reject) => {
-    const backend = getBackendPath();
-    const python = spawn('python', [
-      backend.scriptPath('load_config.py'), 
-      deviceId
-    ], {
-      cwd: backend.workingDir
-    });
-    
-    let result = '';
-    let error = '';
-
-    python.stdout.on('data', (data) => {
-      result += data.toString();
-    });
-
-    python.stderr.on('data', (data) => {
-      error += data.toString();
-    });
-
-    python.on('close', (code) => {
-      if (code === 0) {
-        try {
-          resolve(JSON.parse(result));
-        } catch {
-          resolve({});
-        }
-      } else {
-        reject(new Error(error));
-      }
-    });
+  daemon.stderr.on('data', (data: Buffer) => {
+    console.error('Backend daemon error:', data.toString());
   });
-});
 
-// Hotkey execution
-ipcMain.handle('execute-hotkey', async (_event, hotkeyString: string, holdDuration?: number) => {
-  console.log('Executing hotkey:', hotkeyString, 'with duration:', holdDuration);
-  
-  return new Promise((resolve, reject) => {
-    const backend = getBackendPath();
-    const scriptPath = backend.scriptPath('hotkey_executor.py');
-    console.log('Script path:', scriptPath);
-    
-    const args = [scriptPath, hotkeyString];
-    
-    if (holdDuration !== undefined) {
-      args.push(holdDuration.toString());
+  const failPending = (reason: string) => {
+    // Only once per daemon; a replacement may already be serving new requests
+    if (backendDaemon !== daemon) return;
+    backendDaemon = null;
+    backendOutput = '';
+    for (const id of Array.from(pendingBackendRequests.keys())) {
+      takeBackendRequest(id)?.reject(new Error(reason));
     }
-    
-    console.log('Python args:', args);
-    
-    const python = spawn('python', args, {
-      cwd: backend.workingDir
-    });
-    
-    let result = '';
-    let error = '';
+  };
 
-    python.stdout.on('data', (data) => {
-      result += data.toString();
-      console.log('Python stdout:', data.toString());
-    });
+  daemon.on('close', (code: number) => {
+    console.log(`Backend daemon exited with code ${code}`);
+    failPending(`Backend daemon exited with code ${code}`);
+  });
 
-    python.stderr.on('data', (data) => {
-      error += data.toString();
-      console.log('Python stderr:', data.toString());
-    });
+  daemon.on('error', (error: Error) => {
+    console.error('Failed to start backend daemon:', error);
+    failPending(error.message);
+  });
 
-    python.on('close', (code) => {
-      console.log('Python process exited with code:', code);
-      
-      if (code === 0) {
-        try {
-          const parsed = JSON.parse(result);
-          console.log('Parsed result:', parsed);
-          resolve(parsed);
-        } catch (parseError) {
-          console.log('JSON parse error, raw result:', result);
-          resolve({ success: true, raw: result });
-        }
-      } else {
-        console.log('Python error:', error);
-        reject(new Error(error || 'Unknown error'));
-      }
-    });
+  // Writing to a daemon that died before 'close' fired (EPIPE) errors here
+  daemon.stdin.on('error', (error: Error) => {
+    console.error('Backend daemon stdin error:', error);
+    failPending(`Backend daemon is not reachable: ${error.message}`);
+    daemon.kill();
+  });
 
-    python.on('error', (err) => {
-      console.log('Python spawn error:', err);
-      reject(err);
-    });
+  return daemon;
+}
+
+function callBackend(method: string, params: Record<string, any>): Promise<any> {
+  return new Promise((resolve, reject) => {
+    const daemon = getBackendDaemon();
+    const id = nextBackendRequestId++;
+    const timer = setTimeout(() => {
+      takeBackendRequest(id)?.reject(new Error(`Backend request ${method} timed out after ${BACKEND_REQUEST_TIMEOUT_MS} ms`));
+    }, BACKEND_REQUEST_TIMEOUT_MS);
+    pendingBackendRequests.set(id, { resolve, reject, timer });
+    daemon.stdin.write(JSON.stringify({ id, method, params }) + '\n');
   });
+}
+
+app.on('will-quit', () => {
+  if (backendDaemon) {
+    backendDaemon.stdin.end();
+    backendDaemon = null;
+  }
+});
+
+ipcMain.handle('save-device-config', async (_event, deviceId: string, config: any) => {
+  return callBackend('save_device_config', { device_id: deviceId, config_data: config });
+});
+
+ipcMain.handle('patch-gpio-config', async (_event, deviceId: string, gpio: string, action: any) => {
+  return callBackend('patch_device_config', { device_id: deviceId, gpio, action });
+});
+
+ipcMain.handle('load-device-config', async (_event, deviceId: string) => {
+  return callBackend('load_device_config', { device_id: deviceId });
+});
+
+// Hotkey execution
+ipcMain.handle('execute-hotkey', async (_event, hotkeyString: string, holdDuration?: number) => {
+  console.log('Executing hotkey:', hotkeyString, 'with duration:', holdDuration);
+
+  const params: Record<string, any> = { hotkey_string: hotkeyString };
+  if (holdDuration !== undefined) {
+    params.hold_duration = holdDuration;
+  }
+  return callBackend('execute_hotkey', params);
 });
 
 // Window control handlers
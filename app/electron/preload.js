@@ -19,6 +19,9 @@ const api = {
   saveDeviceConfig: (deviceId, config) => 
     ipcRenderer.invoke('save-device-config', deviceId, config),
   
+  patchGpioConfig: (deviceId, gpio, action) =>
+    ipcRenderer.invoke('patch-gpio-config', deviceId, gpio, action),
+  
   loadDeviceConfig: (deviceId) => 
     ipcRenderer.invoke('load-device-config', deviceId),
   
@@ -19,6 +19,9 @@ const api = {
   saveDeviceConfig: (deviceId: string, config: any) => 
     ipcRenderer.invoke('save-device-config', deviceId, config),
   
+  patchGpioConfig: (deviceId: string, gpio: string, action: any) =>
+    ipcRenderer.invoke('patch-gpio-config', deviceId, gpio, action),
+  
   loadDeviceConfig: (deviceId: string) => 
     ipcRenderer.invoke('load-device-config', deviceId),
   
@@ -51,7 +51,7 @@ const predefinedActions = {
 };
 
 export const ManageDevice: React.FC = () => {
-  const { currentDevice, connectedDevices, deviceConfigs, selectDevice, updateDeviceConfig, loadDeviceConfig } = useDevice();
+  const { currentDevice, connectedDevices, deviceConfigs, selectDevice, updateGpioConfig, loadDeviceConfig } = useDevice();
   const [selectedGpio, setSelectedGpio] = useState<string | null>(null);
   const [configAction, setConfigAction] = useState<GPIOAction>({ type: 'key', action: '' });
   const [testingHotkey, setTestingHotkey] = useState(false);
@@ -223,16 +223,8 @@ export const ManageDevice: React.FC = () => {
         action: cleanAction
       };
       
-      const newGpios = {
-        ...config?.gpios,
-        [selectedGpio]: cleanConfigAction
-      };
-      
       try {
-        await updateDeviceConfig(currentDevice, { 
-          gpios: newGpios,
-          name: config?.name || device?.name || 'ESP32 Device'
-        });
+        await updateGpioConfig(currentDevice, selectedGpio, cleanConfigAction);
         setSelectedGpio(null);
         setConfigAction({ type: 'key', action: '' });
       } catch (error) {
@@ -1,5 +1,5 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
-import { DeviceConfig, DeviceUpdate } from '../types/electron';
+import { DeviceConfig, DeviceUpdate, GPIOAction } from '../types/electron';
 
 interface ConnectedDevice {
   address: string;
@@ -20,6 +20,7 @@ interface DeviceContextType {
   selectDevice: (address: string) => void;
   addDevice: (address: string) => void;
   updateDeviceConfig: (address: string, config: Partial<DeviceConfig>) => Promise<void>;
+  updateGpioConfig: (address: string, gpio: string, action: Partial<GPIOAction> | null) => Promise<void>;
   loadDeviceConfig: (address: string) => Promise<DeviceConfig>;
 }
 
@@ -212,6 +213,34 @@ export const DeviceProvider: React.FC<{ children: React.ReactNode }> = ({ childr
     }
   };
 
+  // Sends only the changed GPIO; the backend merges it into the stored config
+  const updateGpioConfig = async (address: string, gpio: string, action: Partial<GPIOAction> | null) => {
+    if (!window.electronAPI) return;
+
+    const configId = getDeviceConfigId(address);
+    const result = await window.electronAPI.patchGpioConfig(configId, gpio, action);
+    if (!result.success) {
+      throw new Error(result.error || `Failed to update ${gpio}`);
+    }
+    if (result.warnings) {
+      console.warn('DeviceContext: GPIO config warnings:', result.warnings);
+    }
+
+    if (!deviceConfigs[address]) {
+      await loadDeviceConfig(address);
+      return;
+    }
+    setDeviceConfigs(prev => {
+      const gpios = { ...prev[address].gpios };
+      if (result.action) {
+        gpios[gpio] = result.action;
+      } else {
+        delete gpios[gpio];
+      }
+      return { ...prev, [address]: { ...prev[address], gpios } };
+    });
+  };
+
   // Auto-start scanning on mount
   useEffect(() => {
     startScanning();
@@ -231,6 +260,7 @@ export const DeviceProvider: React.FC<{ children: React.ReactNode }> = ({ childr
       selectDevice,
       addDevice,
       updateDeviceConfig,
+      updateGpioConfig,
       loadDeviceConfig
     }}>
       {children}
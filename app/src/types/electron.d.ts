@@ -4,6 +4,7 @@ export interface ElectronAPI {
   onDeviceUpdate: (callback: (data: DeviceUpdate) => void) => void;
   removeDeviceUpdateListener: (callback: (data: DeviceUpdate) => void) => void;
   saveDeviceConfig: (deviceId: string, config: DeviceConfig) => Promise<{ success: boolean }>;
+  patchGpioConfig: (deviceId: string, gpio: string, action: Partial<GPIOAction> | null) => Promise<GPIOPatchResult>;
   loadDeviceConfig: (deviceId: string) => Promise<DeviceConfig>;
   executeHotkey: (hotkeyString: string, holdDuration?: number) => Promise<{ success: boolean; error?: string }>;
   minimizeWindow: () => Promise<void>;
@@ -36,15 +37,34 @@ export interface DeviceUpdate {
 }
 
 export interface GPIOAction {
-  type: 'key' | 'multimedia' | 'system' | 'custom' | 'hotkey';
+  type: 'key' | 'multimedia' | 'system' | 'custom' | 'hotkey' | 'page';
   action: string;
   params?: Record<string, any>;
   holdDuration?: number; // For hotkey actions
+  debounceMs?: number;
+  longPress?: GPIOAction;
+  longPressMs?: number;
+  doublePress?: GPIOAction;
+  doublePressMs?: number;
+  repeat?: boolean;
+  repeatDelayMs?: number;
+  repeatRate?: number; // Repeats per second while held
+}
+
+export interface GPIOPatchResult {
+  success: boolean;
+  gpio?: string;
+  action?: GPIOAction | null;
+  warnings?: string[];
+  error?: string;
 }
 
 export interface DeviceConfig {
   id: string;
   name: string;
   gpios: Record<string, GPIOAction>;
+  pages?: Record<string, { gpios: Record<string, GPIOAction> }>;
+  debounceMs?: number;
   volumeGpio?: string;
+  analog?: { deadband?: number; hysteresis?: number; steps?: number; maxRate?: number };
 }
\ No newline at end of file
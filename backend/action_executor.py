@@ -0,0 +1,193 @@
+"""
+In-process action executor for Stream Deck backend.
+Runs configured GPIO actions inside the scanner process instead of spawning
+gpio_action_handler.py for every button press.
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from action_table import ActionTable, ActionTableCache, DEFAULT_PAGE
+from gpio_frame import GPIO_PIN_MAP, PIN_INDEX
+from key_scheduler import KeyScheduler
+from volume_control import VolumeEngine
+
+
+class ActionExecutor:
+    """
+    Long-lived executor that runs compiled GPIO actions on the event loop.
+
+    run() looks the action up by pin index in the device's compiled action
+    table (loading the config on a bounded thread pool the first time) and
+    plays it on the event loop through a KeyScheduler, so holds and
+    sequences never block the loop or tie up a thread.
+
+    Presses are looked up on the device's active page. Page actions only
+    change the active page name; the pages themselves are precompiled.
+
+    Knob positions go through turn_knob() to the control bound to the knob's
+    pin, e.g. the VolumeEngine for "custom: volume".
+
+    Example usage:
+        executor = ActionExecutor()
+        # From a coroutine, by pin index
+        result = await executor.run('00-4b-12-3b-31-82', 1)
+        print(result['dispatch_ms'])
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64, latency_window: int = 256, keyboard=None,
+                 volume=None):
+        # Rolling windows of dispatch and page switch latencies in milliseconds
+        self.latencies = deque(maxlen=latency_window)
+        self.switch_latencies = deque(maxlen=latency_window)
+        self.active_pages = {}  # device_id -> active page name
+        self.executed = 0
+        self.rejected = 0
+        self.max_pending = max_pending
+        self.pending = 0
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gpio-action')
+        self.scheduler = KeyScheduler(keyboard)
+        self.tables = ActionTableCache()
+        self.volume = volume  # VolumeEngine, created on the first knob update unless given
+        self.volume_error = None  # Why the VolumeEngine couldn't be created
+
+    async def run(self, device_id: str, index: int, pressed_at: float = None, action=None) -> dict:
+        """
+        Execute the action for a pin index without blocking the event loop.
+
+        action is looked up on the active page unless given, e.g. when a
+        gesture decided which of the pin's actions to run. At most max_pending
+        actions may be queued or running; further presses are rejected
+        instead of piling up behind a stuck action.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return {"success": False, "error": "Action executor is busy"}
+
+        if pressed_at is None:
+            pressed_at = time.perf_counter()
+
+        self.pending += 1
+        try:
+            if action is None:
+                action = await self.lookup(device_id, index)
+            if action is None:
+                return {"success": False, "error": f"No configuration found for GPIO {GPIO_PIN_MAP.get(index, index)}"}
+
+            if action.target is not None:
+                page = self.switch_page(device_id, action.target)
+                switch_ms = self.record_latency(pressed_at, self.switch_latencies)
+                return {"success": True, "action": action.description, "page": page, "switch_ms": switch_ms}
+            if action.control is not None:
+                return {"success": False, "error": f"{action.description} is controlled by the analog knob"}
+
+            dispatch_ms = self.record_dispatch(pressed_at)
+            try:
+                await action.handler(action, self.scheduler)
+            except Exception as e:
+                return {"success": False, "error": str(e), "dispatch_ms": dispatch_ms}
+            return {"success": True, "action": action.description, "dispatch_ms": dispatch_ms}
+        finally:
+            self.pending -= 1
+
+    async def prepare(self, device_id: str) -> ActionTable:
+        """Load and compile a device's action table off the loop, e.g. when it connects"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, self.tables.get, device_id)
+
+    async def lookup(self, device_id: str, index: int):
+        """Compiled action for a pin index on the device's active page, or None"""
+        if device_id in self.tables:
+            # Cached config, the lookup is a dict access
+            table = self.tables.get(device_id)
+        else:
+            # First press for this device reads the config file off the loop
+            table = await self.prepare(device_id)
+        return table.get(index, self.active_pages.get(device_id))
+
+    def page_actions(self, device_id: str):
+        """Action list of the device's active page, or None if its config isn't loaded yet"""
+        if device_id not in self.tables:
+            return None
+        table = self.tables.get(device_id)
+        return table.pages.get(self.active_pages.get(device_id), table.actions)
+
+    def active_page(self, device_id: str) -> str:
+        return self.active_pages.get(device_id, DEFAULT_PAGE)
+
+    def switch_page(self, device_id: str, target: str) -> str:
+        """Make the page a page action leads to active, returning its name"""
+        table = self.tables.get(device_id)
+        page = table.resolve_page(self.active_page(device_id), target)
+        self.active_pages[device_id] = page
+        return page
+
+    def turn_knob(self, device_id: str, pin: str, level: float) -> bool:
+        """
+        Send a knob position (0.0 to 1.0) to the control bound to its pin on
+        the active page. Returns False if the pin isn't bound to one.
+        """
+        actions = self.page_actions(device_id)
+        index = PIN_INDEX.get(pin)
+        if actions is None or index is None or actions[index] is None:
+            return False
+
+        control = actions[index].control
+        if control == 'volume':
+            if self.volume is None:
+                if self.volume_error is not None:
+                    # Already reported, don't retry the mixer on every knob update
+                    return False
+                try:
+                    self.volume = VolumeEngine.from_config()
+                except Exception as e:
+                    self.volume_error = str(e)
+                    raise
+            self.volume.set_level(level)
+            return True
+        return False
+
+    def record_latency(self, pressed_at: float, samples: deque) -> float:
+        """Record the time since a press in a latency window"""
+        elapsed_ms = (time.perf_counter() - pressed_at) * 1000
+        samples.append(elapsed_ms)
+        self.executed += 1
+        return round(elapsed_ms, 3)
+
+    def record_dispatch(self, pressed_at: float) -> float:
+        """Record the latency between a press and its action start"""
+        return self.record_latency(pressed_at, self.latencies)
+
+    def shutdown(self):
+        """Stop the worker pool, letting running actions finish"""
+        if self.volume is not None:
+            self.volume.close()
+        self.pool.shutdown(wait=True)
+
+    def latency_stats(self) -> dict:
+        """Return dispatch and page switch latency statistics for the recent presses"""
+        stats = {
+            "count": self.executed,
+            "rejected": self.rejected,
+            "pending": self.pending,
+            "active_holds": self.scheduler.active,
+        }
+        stats.update(summarize_latencies(self.latencies))
+        if self.switch_latencies:
+            stats["page_switch"] = summarize_latencies(self.switch_latencies)
+        return stats
+
+
+def summarize_latencies(latencies) -> dict:
+    """avg, p95 and max of a latency window in milliseconds"""
+    if not latencies:
+        return {}
+
+    samples = sorted(latencies)
+    return {
+        "avg_ms": round(sum(samples) / len(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
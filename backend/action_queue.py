@@ -0,0 +1,190 @@
+"""
+Action queue for Stream Deck backend.
+Orders button presses per pin, bounds how many wait per device and how many
+run at once, and drops presses that waited too long, so a mashed deck or a
+stuck action can't build up a backlog of late actions.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+from action_executor import summarize_latencies
+from gpio_frame import iter_bits
+
+DEFAULT_MAX_DEPTH = 16  # Presses waiting per device
+DEFAULT_MAX_CONCURRENCY = 8  # Actions running at once over all devices
+DEFAULT_MAX_AGE = 1.0  # Seconds a press may wait before it is stale
+
+# What happens to presses that went stale while waiting
+STALE_DROP = 'drop'  # Drop every stale press
+STALE_COALESCE = 'coalesce'  # Run the newest stale press of a pin once, drop the others
+
+
+class QueuedPress:
+    """One press waiting for its pin"""
+
+    __slots__ = ('pressed_at', 'action')
+
+    def __init__(self, pressed_at, action):
+        self.pressed_at = pressed_at
+        self.action = action  # Decided by a gesture, or None to look up on the active page
+
+
+class ActionQueue:
+    """
+    Bounded, per-pin FIFO queue in front of the action executor.
+
+    Each (device, pin) has its own queue and runs one action at a time, so a
+    pin's presses run in order while different pins run side by side. At
+    most max_concurrency actions run at once; pins with waiting presses take
+    turns in the order they became ready. A device may have max_depth
+    presses waiting; a press beyond that pushes out the device's oldest one.
+    Presses that waited longer than max_age when their turn comes are
+    dropped, or with STALE_COALESCE collapsed into the newest stale press of
+    the pin.
+
+    run(device_address, index, pressed_at, action) executes one press. No
+    task is created for a press until it starts.
+
+    Example usage:
+        queue = ActionQueue(run=manager.execute_gpio_action)
+        queue.submit_many(address, pressed_mask, time.perf_counter())
+    """
+
+    def __init__(self, run, max_depth: int = DEFAULT_MAX_DEPTH, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_age: float = DEFAULT_MAX_AGE, stale_policy: str = STALE_COALESCE, wait_window: int = 256):
+        self.run = run
+        self.max_depth = max_depth
+        self.max_concurrency = max_concurrency
+        self.max_age = max_age
+        self.stale_policy = stale_policy
+        self.pins = {}  # (device_address, index) -> deque of QueuedPress
+        self.depths = {}  # device_address -> presses waiting
+        self.ready = deque()  # Idle pins with waiting presses, in the order they became ready
+        self.active = set()  # Pins with an action running
+        self.running = 0
+        self.waits = deque(maxlen=wait_window)  # Press to start, in milliseconds
+        self.submitted = 0
+        self.started = 0
+        self.dropped_stale = 0
+        self.dropped_overflow = 0
+        self.coalesced = 0
+        self.max_depth_seen = 0
+
+    def submit(self, device_address, index: int, pressed_at: float = None, action=None):
+        """Queue one press and start it if its pin is idle and there is capacity"""
+        self.enqueue(device_address, index, time.perf_counter() if pressed_at is None else pressed_at, action)
+        self.pump()
+
+    def submit_many(self, device_address, pressed: int, pressed_at: float = None):
+        """Queue a press for every pin set in the pressed bitmask of one frame"""
+        if pressed_at is None:
+            pressed_at = time.perf_counter()
+        for index in iter_bits(pressed):
+            self.enqueue(device_address, index, pressed_at, None)
+        self.pump()
+
+    def enqueue(self, device_address, index, pressed_at, action):
+        self.submitted += 1
+        if self.depths.get(device_address, 0) >= self.max_depth:
+            self.drop_oldest(device_address)
+
+        key = (device_address, index)
+        presses = self.pins.get(key)
+        if presses is None:
+            presses = self.pins[key] = deque()
+        if not presses and key not in self.active:
+            self.ready.append(key)
+        presses.append(QueuedPress(pressed_at, action))
+
+        depth = self.depths[device_address] = self.depths.get(device_address, 0) + 1
+        self.max_depth_seen = max(self.max_depth_seen, depth)
+
+    def drop_oldest(self, device_address):
+        """Make room by dropping the device's longest-waiting press"""
+        oldest = None
+        for (address, index), presses in self.pins.items():
+            if address == device_address and presses and (oldest is None or presses[0].pressed_at < oldest[0].pressed_at):
+                oldest = presses
+        if oldest is not None:
+            oldest.popleft()
+            self.depths[device_address] -= 1
+            self.dropped_overflow += 1
+
+    def pump(self):
+        """Start waiting presses while there is capacity"""
+        while self.ready and self.running < self.max_concurrency:
+            key = self.ready.popleft()
+            if key in self.active:
+                # Listed again after a clear(); the running action picks up the rest
+                continue
+            presses = self.pins.get(key)
+            press = self.next_press(key, presses) if presses else None
+            if press is None:
+                continue
+
+            self.active.add(key)
+            self.running += 1
+            self.started += 1
+            self.waits.append((time.perf_counter() - press.pressed_at) * 1000)
+            asyncio.get_running_loop().create_task(self.execute(key, press))
+
+    def next_press(self, key, presses):
+        """Take the pin's next press that isn't stale, or None"""
+        device_address = key[0]
+        deadline = time.perf_counter() - self.max_age
+        stale = None
+        while presses:
+            press = presses.popleft()
+            self.depths[device_address] -= 1
+            if press.pressed_at >= deadline:
+                if stale is not None:
+                    self.dropped_stale += 1
+                return press
+            if stale is not None:
+                self.dropped_stale += 1
+            stale = press
+
+        if stale is not None and self.stale_policy == STALE_COALESCE:
+            # Every press waiting on the pin was stale, the newest one still runs
+            self.coalesced += 1
+            return stale
+        if stale is not None:
+            self.dropped_stale += 1
+        return None
+
+    async def execute(self, key, press):
+        try:
+            await self.run(key[0], key[1], press.pressed_at, press.action)
+        finally:
+            self.running -= 1
+            self.active.discard(key)
+            if self.pins.get(key):
+                self.ready.append(key)
+            self.pump()
+
+    def clear(self, device_address):
+        """Drop every waiting press of a device, e.g. when it disconnects; running actions finish"""
+        for key in [key for key in self.pins if key[0] == device_address]:
+            if key not in self.active:
+                del self.pins[key]
+            else:
+                self.pins[key].clear()
+        self.depths.pop(device_address, None)
+
+    def stats(self) -> dict:
+        stats = {
+            "depth": sum(self.depths.values()),
+            "max_depth": self.max_depth_seen,
+            "running": self.running,
+            "submitted": self.submitted,
+            "started": self.started,
+            "dropped_stale": self.dropped_stale,
+            "dropped_overflow": self.dropped_overflow,
+            "coalesced": self.coalesced,
+        }
+        wait = summarize_latencies(self.waits)
+        if wait:
+            stats["wait"] = wait
+        return stats
@@ -0,0 +1,306 @@
+"""
+Compiled action tables for Stream Deck backend.
+Turns a device config into a table of ready-to-run actions indexed by pin
+index, so a button press does no config parsing, type dispatch or hotkey
+parsing. Every page of the config is compiled up front, so switching pages
+only changes which action list is used.
+"""
+
+import numbers
+
+from config_cache import get_config_cache
+from gpio_action_handler import resolve_action, KNOB_CONTROLS
+from gestures import (
+    DEFAULT_DEBOUNCE_MS, DEFAULT_DOUBLE_PRESS_MS, DEFAULT_LONG_PRESS_MS, DEFAULT_REPEAT_DELAY_MS,
+    DEFAULT_REPEAT_RATE, GestureSpec,
+)
+from gpio_frame import NUM_GPIOS, PIN_INDEX
+from hotkey import compile_hotkey
+
+# Page made of the config's top-level gpios; named pages come from "pages"
+DEFAULT_PAGE = 'default'
+
+# Page action targets that cycle through the pages in config order
+NEXT_PAGE = 'next'
+PREVIOUS_PAGE = 'previous'
+
+# Action config keys that make the engine track a pin's presses
+GESTURE_KEYS = ('longPress', 'doublePress', 'repeat')
+
+async def play_hotkey(action, scheduler):
+    """Handler for every hotkey-based action type"""
+    await scheduler.run_plan(action.plan, action.hold_duration, action.gap)
+
+
+class CompiledAction:
+    """One configured GPIO action, resolved to its handler and key plan"""
+
+    __slots__ = ('pin', 'index', 'description', 'handler', 'plan', 'hold_duration', 'gap', 'target',
+                 'control', 'debounce', 'gestures')
+
+    def __init__(self, pin, index, description, handler, plan, hold_duration, gap, target=None, control=None):
+        self.pin = pin
+        self.index = index
+        self.description = description
+        self.handler = handler
+        self.plan = plan
+        self.hold_duration = hold_duration
+        self.gap = gap
+        # Page to switch to, set only for page actions
+        self.target = target
+        # Knob control the pin drives, set only for knob actions
+        self.control = control
+        # Debounce time in seconds and GestureSpec (None for plain presses)
+        self.debounce = DEFAULT_DEBOUNCE_MS / 1000
+        self.gestures = None
+
+    def __repr__(self):
+        return f"CompiledAction({self.pin!r}, {self.description!r})"
+
+
+class ActionTable:
+    """
+    Compiled actions of one device config.
+
+    actions[i] is the CompiledAction for pin index i on the default page, or
+    None if that pin has no action. pages maps each page name to its action
+    list, in config order. errors lists the config problems found while
+    compiling.
+    """
+
+    __slots__ = ('device_id', 'actions', 'errors', 'pages', 'page_names')
+
+    def __init__(self, device_id, actions, errors, pages=None):
+        self.device_id = device_id
+        self.actions = actions
+        self.errors = errors
+        self.pages = pages or {DEFAULT_PAGE: actions}
+        self.page_names = list(self.pages)
+
+    def get(self, index, page=None):
+        """Action for a pin index on a page (default page if not given or unknown), or None"""
+        actions = self.pages.get(page, self.actions) if page else self.actions
+        return actions[index] if 0 <= index < len(actions) else None
+
+    def resolve_page(self, current, target):
+        """Name of the page a page action with target leads to from the current page"""
+        if target not in (NEXT_PAGE, PREVIOUS_PAGE):
+            return target
+
+        position = self.page_names.index(current) if current in self.pages else 0
+        step = 1 if target == NEXT_PAGE else -1
+        return self.page_names[(position + step) % len(self.page_names)]
+
+
+def is_duration(value):
+    return isinstance(value, numbers.Real) and not isinstance(value, bool) and value >= 0
+
+
+def compile_action(pin, index, action_config, debounce_ms=DEFAULT_DEBOUNCE_MS, nested=False):
+    """
+    Compile one GPIO action config, including its gestures.
+
+    Returns:
+        Tuple of (CompiledAction or None, error message or None)
+    """
+    if not isinstance(action_config, dict):
+        return None, f"{pin}: action config must be an object"
+
+    # Pins without an action are simply unbound
+    if not action_config.get('action'):
+        return None, None
+
+    action, error = compile_base_action(pin, index, action_config)
+    if error:
+        return None, error
+
+    debounce_ms = action_config.get('debounceMs', debounce_ms)
+    if not is_duration(debounce_ms):
+        return None, f"{pin}: debounceMs must be a non-negative number"
+    action.debounce = debounce_ms / 1000
+
+    if any(key in action_config for key in GESTURE_KEYS):
+        if nested:
+            return None, f"{pin}: gesture actions can't have gestures of their own"
+        action.gestures, error = compile_gestures(pin, index, action_config, debounce_ms)
+        if error:
+            return None, error
+
+    return action, None
+
+
+def compile_gestures(pin, index, action_config, debounce_ms):
+    """
+    Compile the gesture bindings of an action config into a GestureSpec.
+
+    longPress and doublePress hold action configs of their own, repeat is a
+    boolean. Returns (GestureSpec or None, error message or None).
+    """
+    durations = {}
+    for key, default in (("longPressMs", DEFAULT_LONG_PRESS_MS), ("doublePressMs", DEFAULT_DOUBLE_PRESS_MS),
+                         ("repeatDelayMs", DEFAULT_REPEAT_DELAY_MS)):
+        value = action_config.get(key, default)
+        if not is_duration(value):
+            return None, f"{pin}: {key} must be a non-negative number"
+        durations[key] = value / 1000
+
+    spec = GestureSpec()
+    for key, delay_key in (("longPress", "longPressMs"), ("doublePress", "doublePressMs")):
+        if key not in action_config:
+            continue
+        gesture_action, error = compile_action(pin, index, action_config[key], debounce_ms, nested=True)
+        if error:
+            return None, error.replace(f"{pin}: ", f"{pin}.{key}: ", 1)
+        if key == "longPress":
+            spec.long_press, spec.long_press_s = gesture_action, durations[delay_key]
+        else:
+            spec.double_press, spec.double_press_s = gesture_action, durations[delay_key]
+
+    if action_config.get('repeat'):
+        if spec.long_press is not None:
+            return None, f"{pin}: repeat can't be combined with longPress"
+        rate = action_config.get('repeatRate', DEFAULT_REPEAT_RATE)
+        if not is_duration(rate) or rate == 0:
+            return None, f"{pin}: repeatRate must be a positive number"
+        spec.repeat_delay_s = durations["repeatDelayMs"]
+        spec.repeat_interval_s = 1 / rate
+
+    if spec.long_press is None and spec.double_press is None and spec.repeat_interval_s is None:
+        # Only empty gesture bindings, the pin stays on the plain press path
+        return None, None
+    return spec, None
+
+
+def compile_base_action(pin, index, action_config):
+    """Compile the action itself, without gestures"""
+    if not isinstance(action_config['action'], str):
+        return None, f"{pin}: action must be a string"
+
+    if action_config.get('type') == 'page':
+        target = action_config['action']
+        return CompiledAction(pin, index, f"page: {target}", None, None, 0, 0, target=target), None
+
+    if action_config.get('type') == 'custom' and action_config['action'] in KNOB_CONTROLS:
+        control = action_config['action']
+        return CompiledAction(pin, index, f"custom: {control}", None, None, 0, 0, control=control), None
+
+    resolved = resolve_action(action_config)
+    if not resolved["success"]:
+        return None, f"{pin}: {resolved['error']}"
+
+    hold_duration = resolved["hold_duration"]
+    gap = resolved["gap"]
+    for name, value in (("holdDuration", hold_duration), ("sequenceGap", gap)):
+        if not is_duration(value):
+            return None, f"{pin}: {name} must be a non-negative number"
+
+    plan = compile_hotkey(resolved["hotkey"])
+    if not plan:
+        return None, f"{pin}: no keys found in hotkey '{resolved['hotkey']}'"
+
+    return CompiledAction(pin, index, resolved["action"], play_hotkey, plan, hold_duration, gap), None
+
+
+def compile_gpios(gpios, errors, prefix='', debounce_ms=DEFAULT_DEBOUNCE_MS):
+    """Compile a gpios map into an action list indexed by pin index"""
+    actions = [None] * NUM_GPIOS
+    if not isinstance(gpios, dict):
+        errors.append(f"{prefix}gpios must be an object")
+        return actions
+
+    for pin, action_config in gpios.items():
+        index = PIN_INDEX.get(pin)
+        if index is None:
+            errors.append(f"{prefix}{pin}: unknown GPIO pin")
+            continue
+
+        action, error = compile_action(pin, index, action_config, debounce_ms)
+        if error:
+            errors.append(prefix + error)
+        actions[index] = action
+    return actions
+
+
+def compile_config(device_id, config):
+    """
+    Compile a device config and all its pages into an ActionTable.
+
+    Pages are listed under "pages" as {"<name>": {"gpios": {...}}}; a pin
+    with no action on a page keeps its action from the default page.
+    "debounceMs" sets the debounce time of every pin that doesn't set its own.
+    """
+    config = config or {}
+    errors = []
+    if not isinstance(config, dict):
+        return ActionTable(device_id, [None] * NUM_GPIOS, ["config must be an object"])
+
+    debounce_ms = config.get('debounceMs', DEFAULT_DEBOUNCE_MS)
+    if not is_duration(debounce_ms):
+        errors.append("debounceMs must be a non-negative number")
+        debounce_ms = DEFAULT_DEBOUNCE_MS
+
+    actions = compile_gpios(config.get('gpios', {}), errors, '', debounce_ms)
+    pages = {DEFAULT_PAGE: actions}
+    own_actions = [('', actions)]
+
+    page_configs = config.get('pages', {})
+    if not isinstance(page_configs, dict):
+        errors.append("pages must be an object")
+        page_configs = {}
+
+    for name, page_config in page_configs.items():
+        if name in (DEFAULT_PAGE, NEXT_PAGE, PREVIOUS_PAGE):
+            errors.append(f"pages.{name}: reserved page name")
+            continue
+        if not isinstance(page_config, dict):
+            errors.append(f"pages.{name}: page must be an object")
+            continue
+
+        prefix = f"pages.{name}."
+        page_actions = compile_gpios(page_config.get('gpios', {}), errors, prefix, debounce_ms)
+        pages[name] = [own or default for own, default in zip(page_actions, actions)]
+        own_actions.append((prefix, page_actions))
+
+    # Page actions, including those bound to gestures, must lead somewhere
+    for prefix, page_actions in own_actions:
+        for action in page_actions:
+            if action is None:
+                continue
+            gestures = action.gestures
+            for candidate in (action, gestures and gestures.long_press, gestures and gestures.double_press):
+                if candidate is not None and candidate.target is not None and candidate.target not in pages \
+                        and candidate.target not in (NEXT_PAGE, PREVIOUS_PAGE):
+                    errors.append(f"{prefix}{action.pin}: unknown page '{candidate.target}'")
+
+    return ActionTable(device_id, actions, errors, pages)
+
+
+class ActionTableCache:
+    """
+    Compiled tables for the configs held by a ConfigCache.
+
+    A table is recompiled when the cache holds a different config object for
+    the device than the one it was compiled from, i.e. after a reload or save.
+
+    Example usage:
+        tables = ActionTableCache()
+        action = tables.get('00-4b-12-3b-31-82').get(1)
+    """
+
+    def __init__(self, configs=None):
+        self.configs = configs or get_config_cache()
+        self.tables = {}  # device_id -> (source config, ActionTable)
+
+    def __contains__(self, device_id):
+        return device_id in self.configs
+
+    def get(self, device_id) -> ActionTable:
+        """Return the compiled table for a device"""
+        config = self.configs.get(device_id)
+        entry = self.tables.get(device_id)
+        if entry is not None and entry[0] is config:
+            return entry[1]
+
+        table = compile_config(device_id, config)
+        self.tables[device_id] = (config, table)
+        return table
@@ -0,0 +1,140 @@
+"""
+Analog channel filtering for Stream Deck backend.
+The D15 knob is an analogRead value sent with the button states. This
+filters out ADC jitter, limits how often a moving knob reports, and turns
+its position into detent steps.
+"""
+
+import asyncio
+
+# Index of the analog channel in gpio_states (D15 is first in the firmware's
+# pin order); binary frames carry it in the frame header
+ANALOG_INDEX = 0
+ANALOG_MAX = 4095  # 12-bit ESP32 ADC
+
+DEFAULT_DEADBAND = 24  # Raw units a reading must move before it counts
+DEFAULT_HYSTERESIS = 96  # Raw units a reading must pass a detent boundary by
+DEFAULT_STEPS = 32  # Detents over the full knob range
+DEFAULT_MAX_RATE = 20  # Updates per second while the knob moves
+
+
+class AnalogUpdate:
+    """One reported knob position"""
+
+    __slots__ = ('value', 'level', 'step', 'delta')
+
+    def __init__(self, value, level, step, delta):
+        self.value = value  # Filtered raw reading
+        self.level = level  # Position from 0.0 to 1.0
+        self.step = step  # Detent the knob is in
+        self.delta = delta  # Detents moved since the previous update
+
+    def as_dict(self) -> dict:
+        return {"value": self.value, "level": round(self.level, 4), "step": self.step, "delta": self.delta}
+
+
+class AnalogChannel:
+    """
+    Deadband, detent conversion and rate limit for one analog input.
+
+    feed() takes every raw reading. A reading within the deadband of the
+    last accepted one is dropped. Accepted readings are turned into a detent,
+    which only changes once the reading is past the detent boundary by the
+    hysteresis, so an idle knob reports nothing. Detent changes are reported
+    through on_update at most max_rate times per second; a change arriving
+    sooner is held and reported by a loop timer once the interval has
+    passed, so the final position is never lost.
+
+    Example usage:
+        channel = AnalogChannel(on_update=lambda update: print(update.step))
+        channel.feed(2048)
+    """
+
+    def __init__(self, on_update, deadband: int = DEFAULT_DEADBAND, hysteresis: int = DEFAULT_HYSTERESIS,
+                 steps: int = DEFAULT_STEPS, max_rate: float = DEFAULT_MAX_RATE, loop=None):
+        self.on_update = on_update
+        self.deadband = deadband
+        self.hysteresis = hysteresis
+        self.steps = steps
+        self.detent_size = (ANALOG_MAX + 1) / steps
+        self.interval = 1 / max_rate if max_rate else 0.0
+        self.loop = loop or asyncio.get_running_loop()
+        self.value = None  # Last accepted reading
+        self.pending_step = None  # Detent of the last accepted reading
+        self.step = None  # Detent of the last report
+        self.next_report = 0.0
+        self.timer = None
+        self.readings = 0
+        self.reports = 0
+
+    @classmethod
+    def from_settings(cls, on_update, settings=None, loop=None):
+        """Create a channel from a config's "analog" object, using defaults for missing or invalid values"""
+        settings = settings if isinstance(settings, dict) else {}
+
+        def setting(name, default, minimum):
+            value = settings.get(name, default)
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool) and value >= minimum
+            return value if valid else default
+
+        return cls(
+            on_update,
+            deadband=setting('deadband', DEFAULT_DEADBAND, 0),
+            hysteresis=setting('hysteresis', DEFAULT_HYSTERESIS, 0),
+            steps=int(setting('steps', DEFAULT_STEPS, 1)),
+            max_rate=setting('maxRate', DEFAULT_MAX_RATE, 0),
+            loop=loop,
+        )
+
+    def feed(self, raw: int) -> bool:
+        """Filter one reading; returns True if it moved the knob to another detent"""
+        self.readings += 1
+        if self.value is not None and abs(raw - self.value) <= self.deadband:
+            return False
+        self.value = raw
+
+        step = self.detent(raw)
+        if step == self.pending_step:
+            return False
+        self.pending_step = step
+
+        now = self.loop.time()
+        if now >= self.next_report:
+            self.report(now)
+        elif self.timer is None:
+            self.timer = self.loop.call_at(self.next_report, self.flush)
+        return True
+
+    def flush(self):
+        """Report the detent held back by the rate limit"""
+        self.timer = None
+        if self.pending_step != self.step:
+            self.report(self.loop.time())
+
+    def detent(self, value) -> int:
+        """Detent of a value, sticking to the current one near its boundaries"""
+        candidate = min(int(value / self.detent_size), self.steps - 1)
+        current = self.pending_step
+        if current is None or candidate == current:
+            return candidate
+        if candidate > current and value < candidate * self.detent_size + self.hysteresis:
+            candidate -= 1
+        elif candidate < current and value > current * self.detent_size - self.hysteresis:
+            candidate += 1
+        return candidate
+
+    def report(self, now):
+        step = self.pending_step
+        delta = 0 if self.step is None else step - self.step
+        self.step = step
+        self.next_report = now + self.interval
+        self.reports += 1
+        self.on_update(AnalogUpdate(self.value, min(self.value / ANALOG_MAX, 1.0), step, delta))
+
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def stats(self) -> dict:
+        return {"readings": self.readings, "reports": self.reports}
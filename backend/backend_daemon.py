@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Backend daemon for Stream Deck backend.
+A long-lived process the Electron app talks to over stdin/stdout, so config
+and hotkey calls don't pay for a Python start per request.
+
+Protocol: one JSON object per line in each direction.
+
+    request:  {"id": 1, "method": "load_device_config", "params": {"device_id": "..."}}
+    response: {"id": 1, "result": {...}}
+              {"id": 1, "error": "..."}
+
+Requests are served concurrently, so responses may arrive out of order;
+match them by id.
+"""
+
+import json
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config_cache import get_config_cache
+from load_config import load_device_config
+from save_config import get_config_writer, save_device_config
+from patch_config import patch_device_config
+from hotkey_executor import execute_hotkey
+
+
+def ping():
+    return {"success": True}
+
+
+def save_device_config_deferred(device_id, config_data):
+    """Save through the shared writer, so bursts of edits are written once"""
+    return save_device_config(device_id, config_data, writer=get_config_writer())
+
+
+def patch_device_config_deferred(device_id, gpio, action, page=None):
+    """Patch one GPIO through the shared writer"""
+    return patch_device_config(device_id, gpio, action, writer=get_config_writer(), page=page)
+
+
+# Method name -> callable taking the request params as keyword arguments
+METHODS = {
+    "ping": ping,
+    "load_device_config": load_device_config,
+    "save_device_config": save_device_config_deferred,
+    "patch_device_config": patch_device_config_deferred,
+    "execute_hotkey": execute_hotkey,
+}
+
+
+class BackendDaemon:
+    """
+    Serves line-delimited JSON requests from a stream.
+
+    Example usage:
+        BackendDaemon().serve(sys.stdin, sys.stdout)
+    """
+
+    def __init__(self, methods=None, max_workers: int = 4):
+        self.methods = methods or METHODS
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='backend-request')
+        self.output = None
+        self.output_lock = threading.Lock()
+
+    def respond(self, response: dict):
+        """Write one response line"""
+        line = json.dumps(response) + '\n'
+        with self.output_lock:
+            self.output.write(line)
+            self.output.flush()
+
+    def handle(self, request_id, method, params):
+        """Run one request and write its response"""
+        try:
+            result = self.methods[method](**params)
+            self.respond({"id": request_id, "result": result})
+        except Exception as e:
+            self.respond({"id": request_id, "error": str(e)})
+
+    def handle_line(self, line: str):
+        """Parse a request line and dispatch it to the worker pool"""
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            self.respond({"id": None, "error": f"Invalid JSON request: {str(e)}"})
+            return
+        if not isinstance(request, dict):
+            self.respond({"id": None, "error": "Request must be a JSON object"})
+            return
+
+        request_id = request.get("id")
+        method = request.get("method")
+        params = request.get("params") or {}
+
+        if not isinstance(method, str) or method not in self.methods:
+            self.respond({"id": request_id, "error": f"Unknown method: {method}"})
+            return
+        if not isinstance(params, dict):
+            self.respond({"id": request_id, "error": "params must be an object"})
+            return
+
+        self.pool.submit(self.handle, request_id, method, params)
+
+    def serve(self, input_stream, output_stream):
+        """Serve requests until the input stream is closed"""
+        self.output = output_stream
+        for line in input_stream:
+            if line.strip():
+                self.handle_line(line)
+        self.pool.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    # Turn SIGTERM into a normal exit so pending config writes are flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # Pick up configs changed by other processes, e.g. edited by hand or imported into configs.db
+    get_config_cache().start_watcher()
+    try:
+        BackendDaemon().serve(sys.stdin, sys.stdout)
+    finally:
+        get_config_writer().flush()
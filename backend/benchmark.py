@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the Stream Deck backend hot paths.
+Run without a BLE adapter or keyboard access, e.g.:
+
+    python benchmark.py loop_lag
+    python benchmark.py frame_decode
+    python benchmark.py hotkey_plan
+    python benchmark.py save_throughput
+    python benchmark.py config_load
+    python benchmark.py gesture_feed
+    python benchmark.py analog_filter
+    python benchmark.py volume_knob
+    python benchmark.py action_queue
+    python benchmark.py key_output [pynput | uinput | null | recording ...]
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from action_executor import ActionExecutor, summarize_latencies
+from action_queue import ActionQueue
+from loop_monitor import LoopLagMonitor
+from gpio_frame import decode_frame, encode_binary_frame
+from hotkey import HotkeyRunner, compile_hotkey
+from key_output import OUTPUTS, NullOutput, RecordingOutput, create_output
+from key_scheduler import KeyScheduler
+from action_table import compile_action, compile_config
+from gestures import GestureEngine
+from analog import AnalogChannel
+from volume_control import FakeMixer, VolumeEngine
+from config_cache import ConfigCache, FileConfigBackend, config_path, write_json_atomic
+from config_store import SqliteConfigBackend, import_files
+from save_config import ConfigWriter
+
+
+class ManualClock:
+    """Stands in for the event loop where a benchmark drives time itself"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []
+
+    def time(self):
+        return self.now
+
+    def call_at(self, when, callback):
+        timer = asyncio.TimerHandle(when, callback, (), asyncio.get_running_loop())
+        self.timers.append(timer)
+        return timer
+
+    def advance(self, seconds):
+        """Move time forward, running the timers that come due"""
+        self.now += seconds
+        due = [timer for timer in self.timers if timer.when() <= self.now]
+        self.timers = [timer for timer in self.timers if timer.when() > self.now]
+        for timer in due:
+            if not timer.cancelled():
+                timer._run()
+
+
+class SlowActionExecutor(ActionExecutor):
+    """Executor whose actions are long holds on a keyboard that does nothing"""
+
+    def __init__(self, hold_duration: float, **kwargs):
+        super().__init__(keyboard=NullOutput(), **kwargs)
+        self.hold_duration = hold_duration
+
+    async def lookup(self, device_id, index):
+        return compile_action('d2', index, {
+            "type": "hotkey",
+            "action": "ctrl + shift + b",
+            "holdDuration": self.hold_duration,
+        })[0]
+
+
+async def bench_loop_lag(duration: float = 2.0, notify_interval: float = 0.005):
+    """Notification throughput and loop lag while slow actions are running"""
+    executor = SlowActionExecutor(hold_duration=0.5)
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor_task = asyncio.create_task(monitor.run())
+    handled = 0
+
+    async def notifications():
+        nonlocal handled
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            handled += 1
+            await asyncio.sleep(notify_interval)
+
+    async def presses():
+        tasks = []
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            tasks.append(asyncio.create_task(executor.run('bench', 0)))
+            await asyncio.sleep(0.02)
+        await asyncio.gather(*tasks)
+
+    peak_holds = 0
+
+    async def holds():
+        nonlocal peak_holds
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            peak_holds = max(peak_holds, executor.scheduler.active)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(notifications(), presses(), holds())
+    monitor_task.cancel()
+    executor.shutdown()
+
+    return {
+        "benchmark": "loop_lag",
+        "peak_concurrent_holds": peak_holds,
+        "notifications_per_sec": round(handled / duration, 1),
+        "loop_lag": monitor.snapshot(),
+    }
+
+
+async def bench_frame_decode(frames: int = 200000):
+    """Frames per second decoded for the binary and legacy JSON formats"""
+    gpio_states = [2048, 0, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+    json_frame = json.dumps({
+        "device_id": "ESP32_001",
+        "device_uuid": "00:4b:12:3b:31:82",
+        "client_uuid": "6f1c1d2e-8a43-4d0b-9a3f-0e6a2f6c9b11",
+        "timestamp": 123456,
+        "gpio_states": gpio_states,
+        "type": "update",
+    }).encode()
+    binary_frame = encode_binary_frame(gpio_states, seq=1)
+
+    results = {"benchmark": "frame_decode"}
+    for name, frame in (("json", json_frame), ("binary", binary_frame)):
+        start = time.perf_counter()
+        for _ in range(frames):
+            decode_frame(frame)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "frame_bytes": len(frame),
+            "frames_per_sec": round(frames / elapsed),
+        }
+    return results
+
+
+async def bench_hotkey_plan(calls: int = 50000):
+    """Per-call hotkey overhead: fresh runner and parse per call vs. shared runner and cached plan"""
+    hotkeys = ['ctrl + c', 'ctrl + shift + n', 'alt + tab', 'win + d', 'f11']
+
+    def fresh_runner_per_call(hotkey):
+        # Module-level run_hotkey before plans were cached
+        runner = HotkeyRunner(NullOutput())
+        keys = compile_hotkey.__wrapped__(hotkey).keys
+        for key in keys:
+            runner.keyboard.press(key)
+        for key in reversed(keys):
+            runner.keyboard.release(key)
+
+    shared = HotkeyRunner(NullOutput())
+
+    def shared_runner_cached_plan(hotkey):
+        shared.run_plan(compile_hotkey(hotkey), 0)
+
+    results = {"benchmark": "hotkey_plan"}
+    for name, run in (("fresh_runner", fresh_runner_per_call), ("cached_plan", shared_runner_cached_plan)):
+        start = time.perf_counter()
+        for i in range(calls):
+            run(hotkeys[i % len(hotkeys)])
+        elapsed = time.perf_counter() - start
+        results[name] = {"us_per_call": round(elapsed / calls * 1e6, 3)}
+    return results
+
+
+async def bench_save_throughput(devices: int = 4, bursts: int = 5, edits_per_burst: int = 50, debounce: float = 0.05):
+    """Save call cost and files written for bursts of edits: atomic write per save vs. debounced write-behind"""
+    device_ids = [f'bench-{i:02d}' for i in range(devices)]
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        cache = ConfigCache(config_dir)
+        writer = ConfigWriter(debounce=debounce, cache=cache)
+        direct_writes = 0
+
+        def write_each_save(device_id, config):
+            nonlocal direct_writes
+            write_json_atomic(config_path(device_id, config_dir), config)
+            cache.store(device_id, config)
+            direct_writes += 1
+
+        results = {"benchmark": "save_throughput", "saves": devices * bursts * edits_per_burst}
+        for name, save in (("direct", write_each_save), ("write_behind", writer.save)):
+            busy = 0.0
+            for burst in range(bursts):
+                start = time.perf_counter()
+                for edit in range(edits_per_burst):
+                    for device_id in device_ids:
+                        save(device_id, {"device_id": device_id, "gpios": {"d2": {"type": "hotkey", "action": "ctrl + c", "label": f"edit {burst}.{edit}"}}})
+                busy += time.perf_counter() - start
+                # The user pauses between bursts, long enough for the debounce window to pass
+                await asyncio.sleep(debounce * 2)
+            writer.flush()
+
+            results[name] = {
+                "saves_per_sec": round(results["saves"] / busy),
+                "files_written": direct_writes if name == "direct" else writer.writes,
+            }
+        return results
+
+
+async def bench_config_load(fleet_sizes=(10, 100, 1000), repeats: int = 5):
+    """Startup bulk load of all device configs: one JSON file per device vs. one SQLite database"""
+    gpios = {pin: {"type": "hotkey", "action": "ctrl + shift + b", "holdDuration": 0.1}
+             for pin in ("d2", "d4", "d5", "d12", "d13", "d14", "d16", "d17", "d18", "d19", "d21", "d25", "d26", "d27", "d33")}
+
+    results = {"benchmark": "config_load"}
+    for devices in fleet_sizes:
+        with tempfile.TemporaryDirectory() as config_dir:
+            files = FileConfigBackend(config_dir)
+            for i in range(devices):
+                device_id = f'00-4b-12-3b-{i // 256:02x}-{i % 256:02x}'
+                files.write(device_id, {"id": device_id, "name": f"Deck {i}", "gpios": gpios, "volumeGpio": "d15"})
+            store = SqliteConfigBackend(os.path.join(config_dir, 'configs.db'))
+            import_files(store, config_dir)
+
+            timings = {}
+            for name, backend in (("files", files), ("sqlite", store)):
+                best = None
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    loaded = ConfigCache(config_dir, backend=backend).preload()
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                assert loaded == devices
+                timings[name] = {"load_ms": round(best * 1000, 2)}
+            store.close()
+        results[str(devices)] = timings
+    return results
+
+
+async def bench_gesture_feed(frames: int = 200000):
+    """Per-frame cost of the gesture engine for plain pins vs. pins with long-press and double-press gestures"""
+    plain = compile_config('bench', {"gpios": {"d2": {"type": "hotkey", "action": "ctrl + c"}}}).actions
+    gestures = compile_config('bench', {"gpios": {"d2": {
+        "type": "hotkey", "action": "ctrl + c",
+        "longPress": {"type": "hotkey", "action": "ctrl + v"},
+        "doublePress": {"type": "hotkey", "action": "ctrl + x"},
+    }}}).actions
+
+    results = {"benchmark": "gesture_feed"}
+    for name, actions in (("plain", plain), ("gestures", gestures)):
+        engine = GestureEngine(fire=lambda action, index: None)
+        start = time.perf_counter()
+        for i in range(frames):
+            # Alternate press and release frames of pin d2
+            if i & 1:
+                engine.feed(0, 1, actions)
+            else:
+                engine.feed(1, 0, actions)
+        elapsed = time.perf_counter() - start
+        engine.close()
+        results[name] = {"us_per_frame": round(elapsed / frames * 1e6, 3)}
+    return results
+
+
+async def bench_analog_filter(seconds: float = 600.0, frame_rate: float = 20.0, noise: float = 40.0):
+    """
+    Knob frames (one emit each before the filter) vs. updates reported, with a noisy ADC.
+
+    idle: the knob rests at one position for the whole run.
+    idle_every_sample: the same, with a frame for every sample instead of
+        only for readings that moved by more than the firmware's 100 units.
+    repositioned: the knob is left somewhere new every 10 seconds.
+    turning: one slow turn over the full range.
+    """
+    rng = random.Random(1)
+    results = {"benchmark": "analog_filter", "seconds": seconds, "noise_sd": noise}
+
+    for phase in ("idle", "idle_every_sample", "repositioned", "turning"):
+        clock = ManualClock()
+        reports = []
+        channel = AnalogChannel(reports.append, loop=clock)
+        frames = int(seconds * frame_rate)
+        sent = 0
+        last_sent = None
+        rest = 2000
+        for i in range(frames):
+            if phase == "repositioned" and i % int(10 * frame_rate) == 0:
+                rest = rng.uniform(0, 4095)
+            position = 4095 * (i / frames) if phase == "turning" else rest
+            raw = max(0, min(4095, round(position + rng.gauss(0, noise))))
+            # The firmware sends a frame when the reading moved by more than 100
+            if phase == "idle_every_sample" or last_sent is None or abs(raw - last_sent) > 100:
+                last_sent = raw
+                sent += 1
+                channel.feed(raw)
+            clock.advance(1 / frame_rate)
+        clock.advance(1.0)
+        results[phase] = {
+            "frames": sent,
+            "reports": len(reports),
+            "frames_per_sec": round(sent / seconds, 3),
+            "reports_per_sec": round(len(reports) / seconds, 3),
+            "reduction": round(sent / max(len(reports), 1), 1),
+            "final_step": reports[-1].step if reports else None,
+        }
+    return results
+
+
+async def bench_volume_knob(updates: int = 500, turn_time: float = 1.0, mixer_latency: float = 0.005, max_rate: float = 30):
+    """Mixer calls and time to reach the final level for a fast knob turn, queued per update vs. coalesced"""
+    loop = asyncio.get_running_loop()
+    levels = [(i + 1) / updates for i in range(updates)]
+    results = {"benchmark": "volume_knob", "updates": updates, "mixer_latency_ms": mixer_latency * 1000}
+
+    # Every update becomes its own mixer call on one thread
+    mixer = FakeMixer(latency=mixer_latency)
+    pool = ThreadPoolExecutor(max_workers=1)
+    start = time.perf_counter()
+    calls = []
+    for level in levels:
+        calls.append(loop.run_in_executor(pool, mixer.set_level, level))
+        await asyncio.sleep(turn_time / updates)
+    turned = time.perf_counter()
+    await asyncio.gather(*calls)
+    pool.shutdown()
+    results["queued"] = {
+        "mixer_calls": len(mixer.calls),
+        "settle_ms": round((mixer.calls[-1][0] - turned) * 1000, 1),
+        "total_s": round(time.perf_counter() - start, 3),
+    }
+
+    mixer = FakeMixer(latency=mixer_latency)
+    engine = VolumeEngine(mixer, max_rate=max_rate)
+    start = time.perf_counter()
+    for level in levels:
+        engine.set_level(level)
+        await asyncio.sleep(turn_time / updates)
+    turned = time.perf_counter()
+    while not engine.idle:
+        await asyncio.sleep(0.001)
+    engine.close()
+    results["coalesced"] = {
+        "mixer_calls": len(mixer.calls),
+        "settle_ms": round((mixer.calls[-1][0] - turned) * 1000, 1),
+        "total_s": round(time.perf_counter() - start, 3),
+        "final_level": mixer.level,
+        "stats": engine.stats(),
+    }
+    return results
+
+
+async def bench_action_queue(duration: float = 3.0, press_rate: float = 20, hold_duration: float = 0.2):
+    """Mashing one pin whose action outlasts the press interval: direct tasks vs. an unbounded FIFO vs. the queue"""
+    results = {"benchmark": "action_queue", "presses": int(duration * press_rate), "hold_ms": hold_duration * 1000}
+
+    for mode in ("direct", "fifo", "queue"):
+        executor = SlowActionExecutor(hold_duration=hold_duration)
+        if mode == "fifo":
+            queue = ActionQueue(executor.run, max_depth=10 ** 6, max_age=float('inf'))
+        else:
+            queue = ActionQueue(executor.run)
+
+        tasks = []
+        peak_holds = 0
+        start = time.perf_counter()
+        for _ in range(int(duration * press_rate)):
+            if mode == "direct":
+                tasks.append(asyncio.create_task(executor.run('bench', 1, time.perf_counter())))
+            else:
+                queue.submit('bench', 1, time.perf_counter())
+            peak_holds = max(peak_holds, executor.scheduler.active)
+            await asyncio.sleep(1 / press_rate)
+        mashed = time.perf_counter()
+
+        await asyncio.gather(*tasks)
+        while queue.running or queue.depths.get('bench'):
+            await asyncio.sleep(0.01)
+        executor.shutdown()
+
+        results[mode] = {
+            "actions_run": executor.executed,
+            "peak_concurrent_holds": peak_holds,
+            "drain_after_mashing_ms": round((time.perf_counter() - mashed) * 1000, 1),
+            "total_s": round(time.perf_counter() - start, 3),
+        }
+        if mode != "direct":
+            results[mode]["queue"] = queue.stats()
+    return results
+
+
+async def bench_key_output(outputs=None, events: int = 2000, taps: int = 50, hold_duration: float = 0.02):
+    """
+    Cost of one key event and timing of scheduled taps on each key output.
+
+    Only shift is pressed, so running it against a real output types nothing.
+    Outputs that can't be created here (no display, no evdev) report why.
+    """
+    results = {"benchmark": "key_output"}
+    plan = compile_hotkey('shift')
+    for name in outputs or list(OUTPUTS):
+        try:
+            output = create_output(name)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+
+        try:
+            start = time.perf_counter()
+            for _ in range(events // 2):
+                output.press('shift')
+                output.release('shift')
+            call_us = (time.perf_counter() - start) / events * 1e6
+
+            # Release times against the plan show how closely holds are kept on the loop
+            recording = RecordingOutput(output)
+            scheduler = KeyScheduler(recording)
+            errors = []
+            for _ in range(taps):
+                recording.clear()
+                await scheduler.run_plan(plan, hold_duration)
+                released_at = recording.timeline()[-1][0]
+                errors.append(abs(released_at - hold_duration) * 1000)
+        finally:
+            if hasattr(output, 'close'):
+                output.close()
+
+        results[name] = {"us_per_event": round(call_us, 3), "hold_error": summarize_latencies(errors)}
+    return results
+
+
+BENCHMARKS = {
+    "loop_lag": bench_loop_lag,
+    "frame_decode": bench_frame_decode,
+    "hotkey_plan": bench_hotkey_plan,
+    "save_throughput": bench_save_throughput,
+    "config_load": bench_config_load,
+    "gesture_feed": bench_gesture_feed,
+    "analog_filter": bench_analog_filter,
+    "volume_knob": bench_volume_knob,
+    "action_queue": bench_action_queue,
+    "key_output": bench_key_output,
+}
+
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    if names[0] == "key_output" and len(names) > 1:
+        # Output names follow the benchmark name
+        print(json.dumps(asyncio.run(bench_key_output(names[1:]))))
+        return
+    for name in names:
+        if name not in BENCHMARKS:
+            print(json.dumps({"error": f"Unknown benchmark: {name}", "available": list(BENCHMARKS)}))
+            sys.exit(1)
+        print(json.dumps(asyncio.run(BENCHMARKS[name]())))
+
+
+if __name__ == "__main__":
+    main()
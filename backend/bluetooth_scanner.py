@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import json
 import sys
 from bleak import BleakScanner, BleakClient
@@ -6,80 +7,166 @@ import time
 import signal
 import logging
 import uuid
-import os
-import subprocess
+from action_executor import ActionExecutor
+from action_queue import ActionQueue
+from event_writer import EventWriter
+from config_cache import get_config_cache
+from loop_monitor import LoopLagMonitor
+from liveness import LivenessTracker
+from known_devices import KnownDeviceRegistry
+from gestures import GestureEngine
+from analog import AnalogChannel, ANALOG_INDEX
+from gpio_frame import decode_frame, pack_button_states, FORMAT_BINARY, GPIO_PIN_MAP
 
 # Configure logging
 logging.basicConfig(level=logging.WARNING)
 
 # Global variables for device management
-connected_devices = {}
-device_timeouts = {}
-device_gpio_states = {}  # Track previous GPIO states for button press detection
 client_uuid = str(uuid.uuid4())  # Generate unique client UUID
 
-# GPIO pin mapping (adjust based on your ESP32 setup)
-GPIO_PIN_MAP = {
-    0: "d2", 1: "d4", 2: "d5", 3: "d12", 4: "d13", 5: "d14",
-    6: "d15", 7: "d16", 8: "d17", 9: "d18", 10: "d19", 
-    11: "d21", 12: "d25", 13: "d26", 14: "d27", 15: "d33"
-}
-
 # Service and characteristic UUIDs (must match ESP32)
 SERVICE_UUID = "4fafc201-1fb5-459e-8fcc-c5c9c331914b"
 CHARACTERISTIC_UUID = "beb5483e-36e1-4688-b7f5-ea07361b26a8"
 
+# Devices that send nothing for this long are considered gone (firmware keep-alive is 10 s)
+DEVICE_TIMEOUT = 15.0
+
+# Connection pool settings
+MAX_CONCURRENT_CONNECTS = 3  # Connection attempts allowed at the same time
+CONNECT_TIMEOUT = 10.0  # Seconds per connection attempt
+CONNECT_BACKOFF_BASE = 1.0  # Delay after the first failed attempt, doubled per failure
+CONNECT_BACKOFF_MAX = 60.0
+
+# Direct reconnects to known devices, in parallel with scanning
+DIRECT_CONNECT_TIMEOUT = 5.0
+DIRECT_RECONNECT_ATTEMPTS = 3
+DIRECT_RECONNECT_DELAY = 1.0  # Delay before the second attempt, doubled per attempt
+MAX_DIRECT_CONNECTS = 2  # Direct attempts at the same time, separate from the advertisement pool
+
+# Pairing handshake settings and states
+PAIR_TIMEOUT = 2.0  # Seconds to wait for pair_confirm
+PAIR_ATTEMPTS = 3
+PAIR_PAIRING = "pairing"  # Pair request sent, waiting for pair_confirm
+PAIR_CONFIRMED = "confirmed"  # pair_confirm received, sending connect request
+PAIR_READY = "ready"
+PAIR_FAILED = "failed"
+
+
+def device_id_for(address):
+    """Config device ID of a BLE address (colons replaced with dashes, lowercase)"""
+    return address.replace(':', '-').lower()
+
+
 class DeviceManager:
-    def __init__(self):
-        self.devices = {}
+    def __init__(self, max_concurrent_connects=MAX_CONCURRENT_CONNECTS, connect_timeout=CONNECT_TIMEOUT,
+                 device_timeout=DEVICE_TIMEOUT, known_devices=None):
         self.clients = {}
+        self.button_states = {}  # Previous button bitmask per device for press detection
+        self.liveness = LivenessTracker(device_timeout, self.handle_stale_device)
+        self.known_devices = known_devices if known_devices is not None else KnownDeviceRegistry()
         self.client_uuid = client_uuid
-        print(json.dumps({"debug": f"Client UUID: {self.client_uuid}"}))
+        self.events = EventWriter()  # All output to the Electron app goes through this writer
+        self.action_executor = ActionExecutor()
+        self.action_queue = ActionQueue(self.execute_gpio_action)  # Ordered, bounded presses of all devices
+        self.loop_monitor = LoopLagMonitor()
+        self.frame_formats = {}  # Frame format detected per device address
+        self.gesture_engines = {}  # Debounce and press gesture state per device address
+        self.analog_channels = {}  # Filtered analog knob per device address
+        self.scanner = None
+        self.scan_lock = asyncio.Lock()
+        self.scan_pauses = 0  # Connections in progress; scanning is paused while > 0
+        self.scanning = False  # Whether the scanner is running
+        self.connecting = set()  # Addresses with a connection attempt in progress
+        self.direct_queued = set()  # Addresses with a direct attempt waiting for or holding a direct slot
+        self.discovered_at = {}  # First advertisement time per address, until its first frame
+        self.connect_slots = asyncio.Semaphore(max_concurrent_connects)
+        # Known devices that are switched off must not hold up devices that advertise
+        self.direct_slots = asyncio.Semaphore(MAX_DIRECT_CONNECTS)
+        self.connect_timeout = connect_timeout
+        self.connect_failures = {}  # Consecutive failed attempts per address
+        self.connect_retry_at = {}  # Earliest time.monotonic() for the next attempt per address
+        self.pair_states = {}  # Pairing handshake state per address
+        self.pair_waiters = {}  # Future resolved by the pair_confirm notification per address
+        self.events.emit({"debug": f"Client UUID: {self.client_uuid}"})
         
-    async def notification_handler(self, sender, data):
-        """Handle incoming BLE notifications"""
+    async def notification_handler(self, device_address, sender, data):
+        """Handle incoming BLE notifications from the device bound in connect_device"""
         try:
-            message = data.decode('utf-8')
-            data_obj = json.loads(message)
-            
-            # Get device address from the sender characteristic
-            device_address = None
-            for addr, client in self.clients.items():
-                if client.is_connected:
-                    device_address = addr
-                    break
+            frame_format, data_obj = decode_frame(data)
             
-            if device_address:
-                # Update device timeout
-                device_timeouts[device_address] = time.time()
+            # Ignore late packets from devices that were already removed
+            if device_address in self.clients:
+                # Update device liveness
+                self.liveness.touch(device_address)
+                
+                # Track the frame format each device uses (binary or legacy JSON)
+                if self.frame_formats.get(device_address) != frame_format:
+                    self.frame_formats[device_address] = frame_format
+                    self.events.emit({
+                        "debug": f"Device {device_address} sends {frame_format} frames"
+                    })
                 
                 # Handle pairing confirmation
                 if data_obj.get('action') == 'pair_confirm':
-                    print(json.dumps({
+                    self.events.emit({
                         "debug": f"Pairing confirmed with {device_address}",
                         "device_uuid": data_obj.get('device_uuid'),
                         "status": data_obj.get('status')
-                    }))
+                    })
+                    confirmation = self.pair_waiters.get(device_address)
+                    if confirmation and not confirmation.done():
+                        confirmation.set_result(data_obj)
                     return
                 
                 # Process GPIO data
                 if 'gpio_states' in data_obj:
                     current_gpio_states = data_obj.get('gpio_states', [])
                     
-                    # Check for button presses (0 -> 1 transitions)
-                    if device_address in device_gpio_states:
-                        previous_states = device_gpio_states[device_address]
-                        
-                        # Compare current and previous states to detect button presses
-                        for i, (current, previous) in enumerate(zip(current_gpio_states, previous_states)):
-                            if current == 1 and previous == 0:  # Button press detected
-                                gpio_pin = GPIO_PIN_MAP.get(i)
-                                if gpio_pin:
-                                    # Execute action for this GPIO pin
-                                    asyncio.create_task(self.execute_gpio_action(device_address, gpio_pin))
+                    # First GPIO frame: the device is ready and presses will register
+                    discovered_at = self.discovered_at.pop(device_address, None)
+                    if discovered_at is not None:
+                        self.events.emit({
+                            "debug": f"Device {device_address} ready",
+                            "time_to_first_frame_ms": round((time.perf_counter() - discovered_at) * 1000, 1)
+                        })
+                    
+                    # Button states are kept as one bitmask per device
+                    analog_index = data_obj.get('analog_index', ANALOG_INDEX)
+                    if frame_format == FORMAT_BINARY:
+                        current_mask = data_obj['buttons']
+                    else:
+                        # The analog reading is not a button, whatever its value
+                        current_mask = pack_button_states(current_gpio_states) & ~(1 << analog_index)
+                    
+                    # Filter the knob separately; jitter inside the deadband is dropped here
+                    analog_changed = False
+                    if analog_index < len(current_gpio_states):
+                        channel = self.analog_channel(device_address)
+                        analog_changed = channel.feed(current_gpio_states[analog_index])
+                        current_gpio_states[analog_index] = channel.value
+                    
+                    # Detect all button presses (0 -> 1 transitions) in one step
+                    previous_mask = self.button_states.get(device_address)
+                    if previous_mask is not None:
+                        changed = current_mask ^ previous_mask
+                        if changed:
+                            pressed = changed & current_mask
+                            released = changed & previous_mask
+                            # Drop bounce; pins with gestures are decided by the engine's timer
+                            pressed = self.gesture_engine(device_address).feed(
+                                pressed, released, self.action_executor.page_actions(device_id_for(device_address))
+                            )
+                            if pressed:
+                                # Queued per pin; stale presses are dropped instead of piling up
+                                self.action_queue.submit_many(device_address, pressed, time.perf_counter())
                     
                     # Update stored GPIO states
-                    device_gpio_states[device_address] = current_gpio_states.copy()
+                    self.button_states[device_address] = current_mask
+                    
+                    # Only report frames that change what the UI shows; verify and
+                    # keep-alive frames are always reported as signs of life
+                    if current_mask == previous_mask and not analog_changed and data_obj.get('type') == 'update':
+                        return
                     
                     # Create device info in expected format
                     device_info = {
@@ -91,197 +178,479 @@ class DeviceManager:
                     }
                     
                     # Output the device update
-                    print(json.dumps(device_info))
-                    sys.stdout.flush()
+                    self.events.emit(device_info)
                     
         except Exception as e:
-            print(json.dumps({"error": f"Notification error: {str(e)}"}))
-            sys.stdout.flush()
+            self.events.emit({"error": f"Notification error: {str(e)}"})
+
+    def analog_channel(self, device_address):
+        """Analog channel of a device, created with its config's "analog" settings on first use"""
+        channel = self.analog_channels.get(device_address)
+        if channel is None:
+            config = get_config_cache().get(device_id_for(device_address)) or {}
+            channel = AnalogChannel.from_settings(
+                functools.partial(self.analog_updated, device_address, config.get('volumeGpio', 'd15')),
+                config.get('analog')
+            )
+            self.analog_channels[device_address] = channel
+        return channel
+
+    def analog_updated(self, device_address, gpio_pin, update):
+        """Report a filtered, rate limited knob position and pass it to the pin's control"""
+        self.events.emit({
+            "event": "analog_changed",
+            "address": device_address,
+            "gpio": gpio_pin,
+            **update.as_dict()
+        })
+        try:
+            self.action_executor.turn_knob(device_id_for(device_address), gpio_pin, update.level)
+        except Exception as e:
+            self.events.emit({"error": f"Volume control unavailable: {str(e)}"})
 
-    async def execute_gpio_action(self, device_address, gpio_pin):
+    def gesture_engine(self, device_address):
+        """Gesture engine of a device, created on its first button change"""
+        engine = self.gesture_engines.get(device_address)
+        if engine is None:
+            engine = GestureEngine(functools.partial(self.gesture_fired, device_address))
+            self.gesture_engines[device_address] = engine
+        return engine
+
+    def gesture_fired(self, device_address, action, index):
+        """Run the action a gesture (tap, long press, double press, repeat) resolved to"""
+        self.action_queue.submit(device_address, index, time.perf_counter(), action)
+
+    async def execute_gpio_action(self, device_address, index, pressed_at=None, action=None):
         """Execute action for GPIO button press"""
+        gpio_pin = GPIO_PIN_MAP.get(index, index)
         try:
-            # Convert device address to device ID (replace colons with dashes)
-            device_id = device_address.replace(':', '-').lower()
-            
-            # Execute GPIO action handler
-            script_path = os.path.join(os.path.dirname(__file__), 'gpio_action_handler.py')
+            device_id = device_id_for(device_address)
             
-            # Run the GPIO action handler in a subprocess
-            process = subprocess.Popen(
-                ['python', script_path, device_id, gpio_pin],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=os.path.dirname(__file__)
-            )
-            
-            stdout, stderr = process.communicate(timeout=5)  # 5 second timeout
+            # Run the compiled action; holds are scheduled on the loop, not blocking it
+            result = await self.action_executor.run(device_id, index, pressed_at, action)
             
-            if process.returncode == 0:
-                try:
-                    result = json.loads(stdout)
-                    print(json.dumps({
-                        "debug": f"GPIO {gpio_pin} action executed",
-                        "device": device_id,
-                        "result": result
-                    }))
-                except json.JSONDecodeError:
-                    print(json.dumps({
-                        "debug": f"GPIO {gpio_pin} action executed (non-JSON response)",
-                        "device": device_id,
-                        "output": stdout
-                    }))
+            if result.get("success") and "page" in result:
+                # The active page is kept in the executor and survives reconnects
+                self.events.emit({
+                    "event": "page_changed",
+                    "address": device_address,
+                    "device": device_id,
+                    "page": result["page"],
+                    "switch_ms": result["switch_ms"],
+                    "latency": self.action_executor.latency_stats()
+                })
+            elif result.get("success"):
+                self.events.emit({
+                    "debug": f"GPIO {gpio_pin} action executed",
+                    "device": device_id,
+                    "result": result,
+                    "latency": self.action_executor.latency_stats()
+                })
             else:
-                print(json.dumps({
+                self.events.emit({
                     "error": f"GPIO action failed for {gpio_pin}",
                     "device": device_id,
-                    "stderr": stderr
-                }))
-            
-            sys.stdout.flush()
+                    "result": result
+                })
             
-        except subprocess.TimeoutExpired:
-            print(json.dumps({
-                "error": f"GPIO action timeout for {gpio_pin}",
-                "device": device_address
-            }))
-            sys.stdout.flush()
         except Exception as e:
-            print(json.dumps({
+            self.events.emit({
                 "error": f"GPIO action error: {str(e)}",
                 "device": device_address,
                 "gpio": gpio_pin
-            }))
-            sys.stdout.flush()
+            })
+
+    async def prepare_actions(self, device_id):
+        """Compile a device's actions ahead of its first press and report config problems"""
+        try:
+            table = await self.action_executor.prepare(device_id)
+        except Exception as e:
+            self.events.emit({"error": f"Config compile error for {device_id}: {str(e)}"})
+            return
+        
+        if table.errors:
+            self.events.emit({
+                "error": f"Invalid actions in config for {device_id}",
+                "device": device_id,
+                "details": table.errors
+            })
 
-    async def connect_device(self, device):
+    async def connect_device(self, address, name=None):
         """Connect to a BLE device"""
+        client = None
         try:
-            client = BleakClient(device.address)
+            client = BleakClient(address, disconnected_callback=self.disconnected_callback)
             await client.connect()
             
             # Store client reference
-            self.clients[device.address] = client
-            device_timeouts[device.address] = time.time()
+            self.clients[address] = client
+            self.liveness.touch(address)
             
-            # Start notifications
-            await client.start_notify(CHARACTERISTIC_UUID, self.notification_handler)
+            # Start notifications, bound to this device so packets are routed without a lookup
+            await client.start_notify(
+                CHARACTERISTIC_UUID,
+                functools.partial(self.notification_handler, address)
+            )
             
-            # Send pairing request
-            pairing_data = {
-                "action": "pair",
-                "client_uuid": self.client_uuid
-            }
-            await client.write_gatt_char(CHARACTERISTIC_UUID, json.dumps(pairing_data).encode())
+            # Pairing handshake: pair -> pair_confirm -> connect
+            await self.pair_device(client, address)
             
-            print(json.dumps({
+            self.events.emit({
                 "event": "device_connected",
-                "address": device.address,
-                "name": device.name or f'ESP32-{device.address[-5:]}'
-            }))
-            sys.stdout.flush()
+                "address": address,
+                "name": name or f'ESP32-{address[-5:]}'
+            })
+            
+            self.known_devices.remember(address, name)
+            asyncio.create_task(self.prepare_actions(device_id_for(address)))
+            return client
+            
+        except asyncio.CancelledError:
+            # Attempt timed out, don't leave a half-connected client behind
+            await self.discard_client(address, client)
+            raise
+        except Exception as e:
+            self.events.emit({
+                "error": f"Connection failed for {address}: {str(e)}"
+            })
+            await self.discard_client(address, client)
+            return None
+
+    async def pair_device(self, client, address):
+        """
+        Run the pairing handshake for a connected client.
+        
+        The pair request is answered by a pair_confirm notification, which
+        notification_handler delivers through a future. The connect request
+        goes out as soon as it arrives; unanswered requests are retried.
+        """
+        loop = asyncio.get_running_loop()
+        pairing_data = json.dumps({
+            "action": "pair",
+            "client_uuid": self.client_uuid
+        }).encode()
+        
+        for attempt in range(1, PAIR_ATTEMPTS + 1):
+            self.pair_states[address] = PAIR_PAIRING
+            confirmation = loop.create_future()
+            self.pair_waiters[address] = confirmation
+            try:
+                await client.write_gatt_char(CHARACTERISTIC_UUID, pairing_data)
+                response = await asyncio.wait_for(confirmation, PAIR_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.events.emit({
+                    "debug": f"No pairing confirmation from {address}",
+                    "attempt": attempt
+                })
+                continue
+            finally:
+                self.pair_waiters.pop(address, None)
             
-            # Wait a bit for pairing response
-            await asyncio.sleep(0.5)
+            if response.get('status') != 'paired':
+                continue
             
             # Send connect request
+            self.pair_states[address] = PAIR_CONFIRMED
             connect_data = {
                 "action": "connect",
-                "client_uuid": self.client_uuid
+                "client_uuid": self.client_uuid,
+                "format": FORMAT_BINARY  # Ask for binary frames, older firmware ignores this
             }
             await client.write_gatt_char(CHARACTERISTIC_UUID, json.dumps(connect_data).encode())
+            self.pair_states[address] = PAIR_READY
+            return response
+        
+        self.pair_states[address] = PAIR_FAILED
+        raise ConnectionError(f"Pairing not confirmed after {PAIR_ATTEMPTS} attempts")
+
+    async def discard_client(self, address, client):
+        """Drop a client whose connection attempt failed"""
+        if self.clients.get(address) is client:
+            del self.clients[address]
+        self.forget_device(address)
+        
+        if client is not None:
+            try:
+                await client.disconnect()
+            except Exception:
+                pass
+
+    def config_changed(self, device_id):
+        """Called when a device config file changed on disk"""
+        self.events.emit({"debug": f"Config reloaded for {device_id}"})
+        asyncio.create_task(self.prepare_actions(device_id))
+        # Analog settings may have changed, the channel is recreated on the next frame
+        for address in [a for a in self.analog_channels if device_id_for(a) == device_id]:
+            self.analog_channels.pop(address).close()
+
+    def disconnected_callback(self, client):
+        """Called by bleak as soon as a link is lost"""
+        # Ignore clients that were already replaced or discarded
+        if self.clients.get(client.address) is client:
+            asyncio.create_task(self.remove_device(client.address, "link_lost"))
+
+    def forget_device(self, address):
+        """Drop the per-connection state kept for a device"""
+        self.liveness.remove(address)
+        self.button_states.pop(address, None)
+        self.frame_formats.pop(address, None)
+        self.discovered_at.pop(address, None)
+        engine = self.gesture_engines.pop(address, None)
+        if engine is not None:
+            engine.close()
+        channel = self.analog_channels.pop(address, None)
+        if channel is not None:
+            channel.close()
+        self.action_queue.clear(address)
+        self.pair_states.pop(address, None)
+        self.pair_waiters.pop(address, None)
+
+    async def handle_stale_device(self, address):
+        """Called by the liveness tracker when a device stopped sending data"""
+        await self.remove_device(address, "timeout")
+
+    async def remove_device(self, address, reason):
+        """Disconnect a device and drop all state kept for it"""
+        client = self.clients.pop(address, None)
+        if client is None:
+            return
+        
+        self.forget_device(address)
+        
+        try:
+            if client.is_connected:
+                await client.disconnect()
+        except Exception as e:
+            self.events.emit({"error": f"Cleanup error: {str(e)}"})
+        
+        self.events.emit({
+            "event": "device_disconnected", 
+            "address": address,
+            "reason": reason
+        })
+        
+        # Known devices usually come back quickly after a radio dropout
+        if address in self.known_devices:
+            self.known_devices.seen(address)
+            asyncio.create_task(self.reconnect_known_device(address))
+
+    def detection_callback(self, device, advertisement_data):
+        """Handle a BLE advertisement from the continuous scanner"""
+        service_uuids = [u.lower() for u in advertisement_data.service_uuids]
+        if SERVICE_UUID not in service_uuids:
+            return
+        
+        if device.address in self.clients or device.address in self.connecting:
+            return
+        
+        # Devices that keep failing are retried with exponential backoff
+        retry_at = self.connect_retry_at.get(device.address)
+        if retry_at is not None and time.monotonic() < retry_at:
+            return
+        
+        self.events.emit({
+            "debug": f"ESP32 device detected: {device.name} ({device.address})"
+        })
+        
+        self.start_connect(device.address, device.name)
+
+    def start_connect(self, address, name=None, direct=False):
+        """Start a pooled connection attempt unless one is already running"""
+        if address in self.clients or address in self.connecting:
+            return None
+        if direct and address in self.direct_queued:
+            return None
+        
+        # Remember when the device was first seen to measure time-to-first-frame
+        self.discovered_at.setdefault(address, time.perf_counter())
+        if direct:
+            # Marked as connecting only once a direct slot is free, see connect_pooled
+            self.direct_queued.add(address)
+        else:
+            self.connecting.add(address)
+        return asyncio.create_task(self.connect_pooled(address, name, direct))
+
+    async def connect_pooled(self, address, name=None, direct=False):
+        """
+        Connect to a device through the bounded connection pool.
+        
+        Attempts triggered by an advertisement pause scanning and go through
+        backoff on failure. Direct attempts to known devices run alongside the
+        scanner, so they neither pause it nor delay advertisement-driven retries.
+        A direct attempt waiting for a slot doesn't mark the device as
+        connecting, so an advertisement from it still connects it at once;
+        the direct attempt is skipped when its turn comes.
+        """
+        timeout = DIRECT_CONNECT_TIMEOUT if direct else self.connect_timeout
+        slots = self.direct_slots if direct else self.connect_slots
+        marked = not direct  # Whether this attempt marked the address as connecting
+        try:
+            async with slots:
+                if direct:
+                    if address in self.clients or address in self.connecting:
+                        # Connected or being connected from an advertisement meanwhile
+                        return self.clients.get(address)
+                    self.connecting.add(address)
+                    marked = True
+                else:
+                    await self.pause_scanning()
+                try:
+                    client = await asyncio.wait_for(self.connect_device(address, name), timeout)
+                except asyncio.TimeoutError:
+                    self.events.emit({
+                        "error": f"Connection timed out for {address} after {timeout}s"
+                    })
+                    client = None
+                finally:
+                    if not direct:
+                        await self.resume_scanning()
             
+            if client:
+                self.connect_failures.pop(address, None)
+                self.connect_retry_at.pop(address, None)
+            elif not direct:
+                self.record_connect_failure(address)
             return client
+        finally:
+            if direct:
+                self.direct_queued.discard(address)
+            if marked:
+                self.connecting.discard(address)
+
+    async def reconnect_known_device(self, address):
+        """Try a few direct connections to a known device without waiting for a scan"""
+        name = self.known_devices.get(address).get('name')
+        delay = DIRECT_RECONNECT_DELAY
+        for attempt in range(DIRECT_RECONNECT_ATTEMPTS):
+            if address in self.clients:
+                return
             
-        except Exception as e:
-            print(json.dumps({
-                "error": f"Connection failed for {device.address}: {str(e)}"
-            }))
-            sys.stdout.flush()
-            return None
+            task = self.start_connect(address, name, direct=True)
+            if task and await task:
+                return
+            
+            await asyncio.sleep(delay)
+            delay *= 2
+
+    def reconnect_known_devices(self):
+        """Start direct reconnects to every known device seen recently"""
+        forgotten = self.known_devices.prune()
+        if forgotten:
+            self.events.emit({"debug": f"Forgot {len(forgotten)} known devices not seen recently", "addresses": forgotten})
+        for address in self.known_devices.addresses():
+            asyncio.create_task(self.reconnect_known_device(address))
 
-    async def check_timeouts(self):
-        """Check for device timeouts and cleanup"""
-        current_time = time.time()
-        disconnected_devices = []
+    def record_connect_failure(self, address):
+        """Schedule the next connection attempt with exponential backoff"""
+        failures = self.connect_failures.get(address, 0) + 1
+        self.connect_failures[address] = failures
+        delay = min(CONNECT_BACKOFF_MAX, CONNECT_BACKOFF_BASE * 2 ** (failures - 1))
+        self.connect_retry_at[address] = time.monotonic() + delay
         
-        for address, last_seen in list(device_timeouts.items()):
-            if current_time - last_seen > 15:  # 15 second timeout
-                disconnected_devices.append(address)
-                
-        for address in disconnected_devices:
-            try:
-                if address in self.clients:
-                    await self.clients[address].disconnect()
-                    del self.clients[address]
-                del device_timeouts[address]
-                
-                print(json.dumps({
-                    "event": "device_disconnected", 
-                    "address": address
-                }))
-                sys.stdout.flush()
-                
-            except Exception as e:
-                print(json.dumps({"error": f"Cleanup error: {str(e)}"}))
-                sys.stdout.flush()
+        self.events.emit({
+            "debug": f"Retrying {address} in {delay:.0f}s",
+            "failures": failures
+        })
+
+    async def pause_scanning(self):
+        """Stop the scanner while at least one connection is in progress"""
+        async with self.scan_lock:
+            self.scan_pauses += 1
+            if self.scan_pauses == 1 and self.scanning:
+                try:
+                    await self.scanner.stop()
+                    self.scanning = False
+                except Exception as e:
+                    # Connect anyway; the scanner keeps running alongside
+                    self.events.emit({"error": f"Failed to pause scanning: {str(e)}"})
+
+    async def resume_scanning(self):
+        """Restart the scanner once no connection is in progress"""
+        async with self.scan_lock:
+            self.scan_pauses -= 1
+            if self.scan_pauses == 0:
+                await self.start_scanner()
+
+    async def start_scanner(self):
+        """Start the scanner unless it is running; call with scan_lock held"""
+        if self.scanner is None or self.scanning:
+            return
+        try:
+            await self.scanner.start()
+            self.scanning = True
+        except Exception as e:
+            # Transient adapter errors (e.g. InProgress); scan_and_manage retries every cycle
+            self.events.emit({"error": f"Failed to start scanning: {str(e)}"})
 
     async def scan_and_manage(self):
         """Main scanning and device management loop"""
+        self.scanner = BleakScanner(
+            detection_callback=self.detection_callback,
+            service_uuids=[SERVICE_UUID]
+        )
+        
+        self.events.emit({"debug": "Starting continuous BLE scan..."})
+        
+        async with self.scan_lock:
+            await self.start_scanner()
+        
+        # Reconnect to previously paired devices without waiting for their advertisements
+        self.reconnect_known_devices()
+        
         while True:
             try:
-                # Scan for devices
-                print(json.dumps({"debug": "Starting BLE scan..."}))
-                sys.stdout.flush()
-                
-                devices = await BleakScanner.discover(timeout=5.0)
-                print(json.dumps({"debug": f"Found {len(devices)} devices"}))
-                sys.stdout.flush()
-                
-                for device in devices:
-                    # Debug: Print all discovered devices
-                    print(json.dumps({
-                        "debug": f"Device found: {device.name} ({device.address})"
-                    }))
-                    sys.stdout.flush()
-                    
-                    # Look for our ESP32 devices - be more specific
-                    if device.name and ("ESP32_Streamdeck" in device.name or "ESP32" in device.name):
-                        print(json.dumps({
-                            "debug": f"ESP32 device detected: {device.name} ({device.address})"
-                        }))
-                        sys.stdout.flush()
-                        
-                        # Try to connect if not already connected
-                        if device.address not in self.clients:
-                            await self.connect_device(device)
+                await asyncio.sleep(5)
                 
-                # Check for timeouts
-                await self.check_timeouts()
+                # Restart scanning if it failed to start or resume
+                async with self.scan_lock:
+                    if self.scan_pauses == 0:
+                        await self.start_scanner()
                 
-                # Short delay before next scan
-                await asyncio.sleep(2)
+                # Report event loop lag for the last cycle
+                self.events.emit({
+                    "debug": "Event loop lag",
+                    "loop_lag": self.loop_monitor.snapshot(),
+                    "output": self.events.stats(),
+                    "actions": self.action_queue.stats(),
+                    "gestures": {address: engine.stats() for address, engine in self.gesture_engines.items()},
+                    "analog": {address: channel.stats() for address, channel in self.analog_channels.items()},
+                    "volume": self.action_executor.volume.stats() if self.action_executor.volume else None
+                })
                 
             except Exception as e:
-                print(json.dumps({"error": f"Scan error: {str(e)}"}))
-                sys.stdout.flush()
-                await asyncio.sleep(5)
+                self.events.emit({"error": f"Scan error: {str(e)}"})
 
 async def main():
     device_manager = DeviceManager()
     
     # Handle graceful shutdown
     def signal_handler(signum, frame):
-        print(json.dumps({"event": "shutdown"}))
-        sys.stdout.flush()
+        device_manager.events.emit({"event": "shutdown"})
+        device_manager.events.flush()
         sys.exit(0)
     
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
-    # Start the main loop
-    await device_manager.scan_and_manage()
+    # Load every stored config up front, so connecting devices don't wait on storage
+    loaded = await asyncio.get_running_loop().run_in_executor(None, get_config_cache().preload)
+    device_manager.events.emit({"debug": f"Loaded {loaded} device configs"})
+    
+    # Start the output writer, loop lag monitor, liveness tracking and the main loop
+    background_tasks = [
+        asyncio.create_task(device_manager.events.run()),
+        asyncio.create_task(device_manager.loop_monitor.run()),
+        asyncio.create_task(device_manager.liveness.run()),
+        asyncio.create_task(get_config_cache().watch(device_manager.config_changed, device_manager.events.emit)),
+    ]
+    try:
+        await device_manager.scan_and_manage()
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        device_manager.action_executor.shutdown()
+        device_manager.known_devices.flush()
+        device_manager.events.flush()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,270 @@
+"""
+Device config cache for Stream Deck backend.
+Keeps parsed device configs in memory and reloads them when they change in
+storage, so readers don't open and parse a file on every button press.
+
+Configs are stored as configs/<device_id>.json files, or in a single SQLite
+database once configs/configs.db exists (see config_store.py).
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), '..', 'configs')
+CONFIG_DB = os.path.join(CONFIG_DIR, 'configs.db')
+
+# Files in the config directory that are not device configs
+RESERVED_FILES = ('known_devices.json',)
+
+
+def config_path(device_id, config_dir=CONFIG_DIR):
+    """Path of the config file for a device"""
+    return os.path.join(config_dir, f'{device_id}.json')
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def write_json_atomic(path, data):
+    """
+    Write data as JSON to a temp file next to path and move it into place,
+    so readers see either the old file or the new one, never a partial write.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class FileConfigBackend:
+    """
+    One JSON file per device in the config directory.
+
+    Signatures are (mtime_ns, size) of the file, None if it does not exist.
+    """
+
+    def __init__(self, config_dir: str = CONFIG_DIR):
+        self.config_dir = config_dir
+
+    def signature(self, device_id: str):
+        return file_signature(config_path(device_id, self.config_dir))
+
+    def signatures(self, device_ids) -> dict:
+        """Current signature of each device"""
+        return {device_id: self.signature(device_id) for device_id in device_ids}
+
+    def read(self, device_id: str):
+        """Read and parse a config file, returning (signature, config)"""
+        path = config_path(device_id, self.config_dir)
+        signature = file_signature(path)
+        if signature is None:
+            return (None, None)
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return (signature, json.load(f))
+        except (OSError, json.JSONDecodeError):
+            return (signature, None)
+
+    def write(self, device_id: str, config: dict):
+        write_json_atomic(config_path(device_id, self.config_dir), config)
+
+    def device_ids(self) -> list:
+        """IDs of all devices with a config file"""
+        try:
+            names = os.listdir(self.config_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            name[:-len('.json')] for name in names
+            if name.endswith('.json') and not name.startswith('.') and name not in RESERVED_FILES
+        )
+
+    def load_all(self) -> dict:
+        """device_id -> (signature, config) for every stored config"""
+        return {device_id: self.read(device_id) for device_id in self.device_ids()}
+
+
+class ConfigCache:
+    """
+    Parsed device configs keyed by device ID.
+
+    get() is a dict lookup once a config is cached. poll() re-checks the
+    signatures of all cached configs and reloads the ones that changed;
+    watch() runs it periodically on an event loop, start_watcher() on a
+    thread. preload() bulk-loads every stored config. Configs saved in
+    this process are written with save(), or cached with store() after
+    being written elsewhere.
+
+    Cached configs are shared between readers and must not be modified.
+
+    Example usage:
+        cache = get_config_cache()
+        config = cache.get('00-4b-12-3b-31-82')  # None if missing or invalid
+    """
+
+    def __init__(self, config_dir: str = CONFIG_DIR, poll_interval: float = 0.5, backend=None):
+        self.config_dir = config_dir
+        self.backend = backend or FileConfigBackend(config_dir)
+        self.poll_interval = poll_interval
+        self.entries = {}  # device_id -> (file signature, parsed config or None)
+        self.lock = threading.Lock()
+        self.loads = 0
+
+    def __contains__(self, device_id):
+        return device_id in self.entries
+
+    def get(self, device_id: str):
+        """Return the parsed config for a device, or None if it has no valid config file"""
+        entry = self.entries.get(device_id)
+        if entry is not None:
+            return entry[1]
+
+        with self.lock:
+            entry = self.entries.get(device_id)
+            if entry is None:
+                entry = self.load(device_id)
+                self.entries[device_id] = entry
+            return entry[1]
+
+    def load(self, device_id: str):
+        """Read a config from the backend, returning (signature, config)"""
+        self.loads += 1
+        return self.backend.read(device_id)
+
+    def preload(self) -> int:
+        """Load every stored config into the cache, returning how many were loaded"""
+        entries = self.backend.load_all()
+        with self.lock:
+            self.entries.update(entries)
+        self.loads += len(entries)
+        return len(entries)
+
+    def save(self, device_id: str, config: dict):
+        """Write a config to the backend and cache it"""
+        self.backend.write(device_id, config)
+        self.store(device_id, config)
+
+    def store(self, device_id: str, config: dict):
+        """Cache a config that was just written to the backend"""
+        with self.lock:
+            self.entries[device_id] = (self.backend.signature(device_id), config)
+
+    def invalidate(self, device_id: str = None):
+        """Drop one cached config, or all of them"""
+        with self.lock:
+            if device_id is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(device_id, None)
+
+    def poll(self) -> list:
+        """Reload cached configs that changed in the backend, returning their device IDs"""
+        changed = self.adopt_database()
+        with self.lock:
+            entries = list(self.entries.items())
+        current = self.backend.signatures([device_id for device_id, _ in entries])
+        for device_id, (signature, _) in entries:
+            if current.get(device_id) != signature:
+                entry = self.load(device_id)
+                with self.lock:
+                    self.entries[device_id] = entry
+                changed.append(device_id)
+        return changed
+
+    def adopt_database(self) -> list:
+        """
+        Switch from the config files to configs.db once `config_store.py import`
+        created it, returning the device IDs whose configs are reloaded.
+        """
+        if self.config_dir != CONFIG_DIR or not isinstance(self.backend, FileConfigBackend) \
+                or not os.path.exists(CONFIG_DB):
+            return []
+
+        from config_store import SqliteConfigBackend
+        backend = SqliteConfigBackend(CONFIG_DB)
+        with self.lock:
+            self.backend = backend
+            changed = list(self.entries)
+            self.entries.clear()
+        return changed
+
+    async def watch(self, on_change=None, on_error=None):
+        """
+        Poll for changed configs until cancelled.
+
+        A failed poll (e.g. an OSError, or configs.db still locked by an
+        import) is passed to on_error as an error event, or written to
+        stderr, and polling goes on.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                changed = await loop.run_in_executor(None, self.poll)
+            except Exception as e:
+                error = {"error": f"Config poll failed: {str(e)}"}
+                if on_error:
+                    on_error(error)
+                else:
+                    print(json.dumps(error), file=sys.stderr)
+                continue
+            if on_change:
+                for device_id in changed:
+                    on_change(device_id)
+
+    def start_watcher(self, on_change=None) -> threading.Thread:
+        """Poll for changed configs on a daemon thread, for processes without an event loop"""
+        def run():
+            while True:
+                time.sleep(self.poll_interval)
+                try:
+                    changed = self.poll()
+                except Exception as e:
+                    print(json.dumps({"error": f"Config poll failed: {str(e)}"}), file=sys.stderr)
+                    continue
+                if on_change:
+                    for device_id in changed:
+                        on_change(device_id)
+
+        thread = threading.Thread(target=run, name='config-watcher', daemon=True)
+        thread.start()
+        return thread
+
+
+_shared_cache = None
+
+
+def get_config_cache() -> ConfigCache:
+    """Return the process-wide ConfigCache, creating it on first use"""
+    global _shared_cache
+    if _shared_cache is None:
+        backend = None
+        if os.path.exists(CONFIG_DB):
+            # Imported into SQLite with `python config_store.py import`
+            from config_store import SqliteConfigBackend
+            backend = SqliteConfigBackend(CONFIG_DB)
+        _shared_cache = ConfigCache(backend=backend)
+    return _shared_cache
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+SQLite config store for Stream Deck backend.
+Keeps every device config in one WAL-mode database instead of a file per
+device, so all configs load with a single query and saves are transactional.
+
+The backend switches to it when configs/configs.db exists:
+
+    python config_store.py import   # configs/*.json -> configs/configs.db
+    python config_store.py export   # configs/configs.db -> configs/*.json
+    python config_store.py list
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from config_cache import CONFIG_DB, CONFIG_DIR, FileConfigBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS configs (
+    device_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    updated_at REAL NOT NULL
+)
+"""
+
+UPSERT = """
+INSERT INTO configs (device_id, data, updated_at) VALUES (?, ?, ?)
+ON CONFLICT(device_id) DO UPDATE SET
+    data = excluded.data,
+    version = configs.version + 1,
+    updated_at = excluded.updated_at
+"""
+
+
+class SqliteConfigBackend:
+    """
+    Device configs in a SQLite database, one row per device.
+
+    Signatures are the row's version, which every write increments, so
+    other processes sharing the database pick up changes on their next poll.
+
+    Example usage:
+        cache = ConfigCache(backend=SqliteConfigBackend())
+        cache.preload()
+    """
+
+    def __init__(self, path: str = CONFIG_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Shared by the daemon's worker threads, serialized by the lock
+        self.conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(SCHEMA)
+
+    def signature(self, device_id: str):
+        with self.lock:
+            row = self.conn.execute("SELECT version FROM configs WHERE device_id = ?", (device_id,)).fetchone()
+        return row[0] if row else None
+
+    def signatures(self, device_ids) -> dict:
+        """Current signature of each device, read in one query"""
+        with self.lock:
+            versions = dict(self.conn.execute("SELECT device_id, version FROM configs"))
+        return {device_id: versions.get(device_id) for device_id in device_ids}
+
+    @staticmethod
+    def parse(version, data):
+        try:
+            return (version, json.loads(data))
+        except json.JSONDecodeError:
+            return (version, None)
+
+    def read(self, device_id: str):
+        """Read and parse a config, returning (signature, config)"""
+        with self.lock:
+            row = self.conn.execute("SELECT version, data FROM configs WHERE device_id = ?", (device_id,)).fetchone()
+        if row is None:
+            return (None, None)
+        return self.parse(*row)
+
+    def write(self, device_id: str, config: dict):
+        """Save one config in its own transaction"""
+        self.write_many({device_id: config})
+
+    def write_many(self, configs: dict):
+        """Save several configs in one transaction, all or nothing"""
+        now = time.time()
+        rows = [(device_id, json.dumps(config), now) for device_id, config in configs.items()]
+        with self.lock, self.conn:
+            self.conn.executemany(UPSERT, rows)
+
+    def delete(self, device_id: str):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM configs WHERE device_id = ?", (device_id,))
+
+    def device_ids(self) -> list:
+        """IDs of all stored devices"""
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT device_id FROM configs ORDER BY device_id")]
+
+    def load_all(self) -> dict:
+        """device_id -> (signature, config) for every stored config"""
+        with self.lock:
+            rows = self.conn.execute("SELECT device_id, version, data FROM configs").fetchall()
+        return {device_id: self.parse(version, data) for device_id, version, data in rows}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def import_files(store: SqliteConfigBackend, config_dir: str = CONFIG_DIR) -> dict:
+    """Copy every valid configs/<device_id>.json into the store in one transaction"""
+    configs = {}
+    invalid = []
+    for device_id, (_, config) in FileConfigBackend(config_dir).load_all().items():
+        if config is None:
+            invalid.append(device_id)
+        else:
+            configs[device_id] = config
+
+    store.write_many(configs)
+    return {"imported": sorted(configs), "invalid": invalid}
+
+
+def export_files(store: SqliteConfigBackend, config_dir: str = CONFIG_DIR) -> dict:
+    """Write every stored config back out as configs/<device_id>.json"""
+    files = FileConfigBackend(config_dir)
+    exported = []
+    invalid = []
+    for device_id, (_, config) in sorted(store.load_all().items()):
+        if config is None:
+            invalid.append(device_id)
+            continue
+        files.write(device_id, config)
+        exported.append(device_id)
+    return {"exported": exported, "invalid": invalid}
+
+
+def main():
+    commands = ('import', 'export', 'list')
+    if len(sys.argv) not in (2, 3) or sys.argv[1] not in commands:
+        print(json.dumps({"success": False, "error": "Usage: config_store.py <import | export | list> [database]"}))
+        sys.exit(1)
+
+    command = sys.argv[1]
+    path = sys.argv[2] if len(sys.argv) == 3 else CONFIG_DB
+    if command != 'import' and not os.path.exists(path):
+        print(json.dumps({"success": False, "error": f"No config database at {path}"}))
+        sys.exit(1)
+
+    store = SqliteConfigBackend(path)
+    try:
+        if command == 'import':
+            result = import_files(store)
+        elif command == 'export':
+            result = export_files(store)
+        else:
+            result = {"devices": store.device_ids()}
+    finally:
+        store.close()
+
+    print(json.dumps({"success": True, **result}))
+
+
+if __name__ == "__main__":
+    main()
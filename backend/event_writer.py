@@ -0,0 +1,134 @@
+"""
+Asynchronous stdout event writer for Stream Deck backend.
+The scanner reports everything to the Electron app as JSON lines on stdout.
+This writer batches those lines and writes them off the event loop, so a
+slow reader on the other end of the pipe never stalls BLE handling.
+"""
+
+import asyncio
+import json
+import sys
+
+
+class EventWriter:
+    """
+    Single writer task fed by a bounded queue.
+
+    While a write is in progress new events accumulate; a gpio_states update
+    replaces any unwritten update for the same device, so a slow consumer
+    only ever gets the latest state, and an error identical to an unwritten
+    one only raises that one's "repeated" count. At most max_pending events
+    wait: beyond that debug lines and state updates are dropped, and events
+    and errors push out the oldest debug line or state update, or the
+    oldest event if nothing else is left.
+
+    Example usage:
+        writer = EventWriter()
+        asyncio.create_task(writer.run())
+        writer.emit({"event": "device_connected", "address": address})
+    """
+
+    def __init__(self, stream=None, max_pending: int = 1024):
+        self.stream = stream or sys.stdout
+        self.max_pending = max_pending
+        self.pending = []
+        self.state_slots = {}  # address -> index of its unwritten gpio_states update
+        self.error_slots = {}  # serialized error -> index of the unwritten identical error
+        self.ready = asyncio.Event()
+        self.written = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.repeated = 0
+        self.dropped = 0
+
+    def emit(self, event: dict):
+        """Queue an event for writing without blocking"""
+        address = event.get("address") if "gpio_states" in event else None
+        if address is not None:
+            slot = self.state_slots.get(address)
+            if slot is not None:
+                # Superseded update for the same device that was never written
+                self.pending[slot] = event
+                self.coalesced += 1
+                return
+
+        error_key = None
+        if "error" in event:
+            error_key = json.dumps(event, sort_keys=True, default=str)
+            slot = self.error_slots.get(error_key)
+            if slot is not None:
+                # e.g. one "Notification error" per packet of a device sending malformed frames
+                repeated = self.pending[slot]
+                self.pending[slot] = {**repeated, "repeated": repeated.get("repeated", 1) + 1}
+                self.repeated += 1
+                return
+
+        if len(self.pending) >= self.max_pending:
+            if "event" not in event and "error" not in event:
+                self.dropped += 1
+                return
+            self.evict()
+
+        if address is not None:
+            self.state_slots[address] = len(self.pending)
+        if error_key is not None:
+            self.error_slots[error_key] = len(self.pending)
+        self.pending.append(event)
+        self.ready.set()
+
+    def evict(self):
+        """Drop the oldest debug line or state update, or the oldest event if there is none"""
+        index = next((i for i, event in enumerate(self.pending) if "event" not in event and "error" not in event), 0)
+        del self.pending[index]
+        self.dropped += 1
+        # Later events moved up by one
+        for slots in (self.state_slots, self.error_slots):
+            for key, slot in list(slots.items()):
+                if slot == index:
+                    del slots[key]
+                elif slot > index:
+                    slots[key] = slot - 1
+
+    def take_batch(self) -> list:
+        """Remove and return all queued events"""
+        batch = self.pending
+        self.pending = []
+        self.state_slots = {}
+        self.error_slots = {}
+        self.ready.clear()
+        return batch
+
+    def write_batch(self, batch: list):
+        """Serialize and write a batch with a single flush"""
+        self.stream.write(''.join(json.dumps(event) + '\n' for event in batch))
+        self.stream.flush()
+        self.written += len(batch)
+        self.batches += 1
+
+    async def run(self):
+        """Write queued events until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.ready.wait()
+            batch = self.take_batch()
+            try:
+                await loop.run_in_executor(None, self.write_batch, batch)
+            except (BrokenPipeError, ValueError):
+                # Consumer went away, nothing left to report to
+                return
+
+    def flush(self):
+        """Write everything still queued synchronously, e.g. on shutdown"""
+        batch = self.take_batch()
+        if batch:
+            self.write_batch(batch)
+
+    def stats(self) -> dict:
+        return {
+            "written": self.written,
+            "batches": self.batches,
+            "coalesced": self.coalesced,
+            "repeated": self.repeated,
+            "dropped": self.dropped,
+            "pending": len(self.pending),
+        }
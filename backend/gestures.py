@@ -0,0 +1,234 @@
+"""
+Press gestures for Stream Deck backend.
+Debounces button edges and turns presses into tap, long-press, double-press
+and hold-repeat actions, with one event loop timer per device.
+"""
+
+import asyncio
+import heapq
+import itertools
+
+from gpio_frame import NUM_GPIOS, iter_bits
+
+# The firmware samples the buttons every 50 ms, so contact bounce shows up as
+# a release lasting a single sample. Presses this soon after a release of the
+# same pin are dropped.
+DEFAULT_DEBOUNCE_MS = 70
+
+DEFAULT_LONG_PRESS_MS = 500
+DEFAULT_DOUBLE_PRESS_MS = 300
+DEFAULT_REPEAT_DELAY_MS = 400
+DEFAULT_REPEAT_RATE = 10  # Repeats per second while held
+
+# Pin states
+IDLE = 0
+PRESSED = 1  # Held, no gesture decided yet
+CONSUMED = 2  # Held, but the press already fired its gesture
+WAIT_SECOND = 3  # Released, waiting to see if a second press follows
+
+# Timer kinds
+LONG_PRESS = 'long_press'
+REPEAT = 'repeat'
+DOUBLE_TIMEOUT = 'double_timeout'
+RELEASE = 'release'
+
+
+class GestureSpec:
+    """Gesture bindings of one pin, times in seconds"""
+
+    __slots__ = ('long_press', 'long_press_s', 'double_press', 'double_press_s', 'repeat_delay_s', 'repeat_interval_s')
+
+    def __init__(self, long_press=None, long_press_s=0.0, double_press=None, double_press_s=0.0,
+                 repeat_delay_s=None, repeat_interval_s=None):
+        self.long_press = long_press
+        self.long_press_s = long_press_s
+        self.double_press = double_press
+        self.double_press_s = double_press_s
+        self.repeat_delay_s = repeat_delay_s
+        self.repeat_interval_s = repeat_interval_s
+
+
+class GestureEngine:
+    """
+    Per-device gesture state machine.
+
+    feed() takes the pressed and released bitmasks of a frame and returns
+    the pins whose action should run right away. Pins whose action has no
+    gestures only go through the debounce check; the others are tracked
+    per pin, and their delayed decisions (long press, double-press timeout,
+    repeats, confirming a release after the debounce time) are deadlines in
+    a heap served by a single loop.call_at timer.
+
+    fire(action, index) is called for actions decided by the engine.
+
+    Example usage:
+        engine = GestureEngine(fire=lambda action, index: ...)
+        run_now = engine.feed(pressed, released, page_actions)
+    """
+
+    def __init__(self, fire, loop=None):
+        self.fire = fire
+        self.loop = loop or asyncio.get_running_loop()
+        self.released_at = [float('-inf')] * NUM_GPIOS
+        self.states = [IDLE] * NUM_GPIOS
+        self.generations = [0] * NUM_GPIOS  # Bumped to invalidate a pin's pending deadlines
+        self.held = [None] * NUM_GPIOS  # Action of the press a pin's gesture belongs to
+        self.release_pending = [None] * NUM_GPIOS  # Deadline confirming a release, while it may still be bounce
+        self.heap = []  # (deadline, seq, index, kind, generation)
+        self.sequence = itertools.count()
+        self.timer = None
+        self.bounced = 0
+        self.gestures = 0
+
+    def feed(self, pressed: int, released: int, actions=None) -> int:
+        """Process the edges of one frame, returning the bitmask of pins to run now"""
+        now = self.loop.time()
+        run_now = 0
+
+        for index in iter_bits(released):
+            self.released_at[index] = now
+            if self.states[index] != IDLE:
+                self.release(index, now)
+
+        for index in iter_bits(pressed):
+            action = actions[index] if actions else None
+            if action is None or action.gestures is None:
+                if self.states[index] != IDLE:
+                    # The pin lost its gestures through a config change or page switch
+                    self.reset(index)
+                debounce = action.debounce if action is not None else DEFAULT_DEBOUNCE_MS / 1000
+                if now - self.released_at[index] < debounce:
+                    self.bounced += 1
+                    continue
+                run_now |= 1 << index
+            else:
+                self.press(index, action, now)
+
+        return run_now
+
+    def press(self, index, action, now):
+        spec = action.gestures
+        state = self.states[index]
+
+        if self.release_pending[index] is not None:
+            # Released and pressed again within the debounce time: contact bounce
+            self.release_pending[index] = None
+            self.bounced += 1
+            return
+
+        if state == WAIT_SECOND and self.held[index] is action:
+            self.generations[index] += 1
+            self.states[index] = CONSUMED
+            self.emit(spec.double_press, index)
+            return
+
+        if state == WAIT_SECOND:
+            # Config changed between the presses, settle the first one as a tap
+            self.emit(self.held[index], index)
+        elif now - self.released_at[index] < action.debounce:
+            self.bounced += 1
+            return
+
+        generation = self.generations[index] = self.generations[index] + 1
+        self.states[index] = PRESSED
+        self.held[index] = action
+        if spec.long_press is not None:
+            self.schedule(now + spec.long_press_s, index, LONG_PRESS, generation)
+        if spec.repeat_interval_s is not None:
+            self.schedule(now + spec.repeat_delay_s, index, REPEAT, generation)
+        if spec.long_press is None and spec.double_press is None:
+            # Nothing to wait for, the tap runs on press
+            self.emit(action, index)
+
+    def release(self, index, now):
+        action = self.held[index]
+        if action.debounce > 0:
+            # Only act on releases that last longer than the debounce time
+            deadline = now + action.debounce
+            self.release_pending[index] = deadline
+            self.schedule(deadline, index, RELEASE, self.generations[index])
+            return
+        self.confirm_release(index, now)
+
+    def confirm_release(self, index, now):
+        self.release_pending[index] = None
+        action = self.held[index]
+        spec = action.gestures
+        state = self.states[index]
+        generation = self.generations[index] = self.generations[index] + 1
+
+        if state == PRESSED and spec.double_press is not None:
+            self.states[index] = WAIT_SECOND
+            self.schedule(now + spec.double_press_s, index, DOUBLE_TIMEOUT, generation)
+            return
+
+        if state == PRESSED and spec.long_press is not None:
+            # Released before the long press threshold
+            self.emit(action, index)
+        self.states[index] = IDLE
+        self.held[index] = None
+
+    def reset(self, index):
+        self.generations[index] += 1
+        self.states[index] = IDLE
+        self.held[index] = None
+        self.release_pending[index] = None
+
+    def emit(self, action, index):
+        self.gestures += 1
+        self.fire(action, index)
+
+    def schedule(self, deadline, index, kind, generation):
+        heapq.heappush(self.heap, (deadline, next(self.sequence), index, kind, generation))
+        if self.timer is None or deadline < self.timer.when():
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = self.loop.call_at(deadline, self.on_timer)
+
+    def on_timer(self):
+        """Handle every deadline that came due, then re-arm the timer"""
+        self.timer = None
+        now = self.loop.time()
+        while self.heap and self.heap[0][0] <= now:
+            deadline, _, index, kind, generation = heapq.heappop(self.heap)
+            if generation != self.generations[index]:
+                continue
+            self.expire(index, kind, deadline)
+
+        if self.heap and self.timer is None:
+            self.timer = self.loop.call_at(self.heap[0][0], self.on_timer)
+
+    def expire(self, index, kind, deadline):
+        state = self.states[index]
+        action = self.held[index]
+        release_pending = self.release_pending[index]
+
+        if kind == RELEASE:
+            # Ignore deadlines of releases that turned out to be bounce
+            if release_pending == deadline:
+                self.confirm_release(index, deadline)
+        elif kind == LONG_PRESS and state == PRESSED:
+            if release_pending is not None:
+                # Decide once it's known whether the button was really released
+                self.schedule(release_pending, index, LONG_PRESS, self.generations[index])
+                return
+            self.states[index] = CONSUMED
+            self.emit(action.gestures.long_press, index)
+        elif kind == REPEAT and state == PRESSED:
+            if release_pending is None:
+                self.emit(action, index)
+            self.schedule(deadline + action.gestures.repeat_interval_s, index, REPEAT, self.generations[index])
+        elif kind == DOUBLE_TIMEOUT and state == WAIT_SECOND:
+            self.states[index] = IDLE
+            self.held[index] = None
+            self.emit(action, index)
+
+    def close(self):
+        """Cancel the timer and drop all pending gestures"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        self.heap.clear()
+
+    def stats(self) -> dict:
+        return {"bounced": self.bounced, "gestures": self.gestures, "pending_timers": len(self.heap)}
@@ -6,78 +6,85 @@ This script handles action execution based on GPIO button presses.
 
 import sys
 import json
-import os
-from hotkey import run_hotkey
+from config_cache import get_config_cache
+from hotkey import run_hotkey, SEQUENCE_GAP
 
 def load_device_config(device_id):
-    """Load device configuration from file"""
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'configs', f'{device_id}.json')
-    try:
-        with open(config_path, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
-    except json.JSONDecodeError:
-        return {}
+    """Load device configuration, served from the shared config cache"""
+    return get_config_cache().get(device_id) or {}
 
-def execute_action(action_config):
-    """Execute an action based on its configuration"""
+# Multimedia actions as hotkeys
+MULTIMEDIA_MAP = {
+    'play_pause': 'space',  # or use media keys if available
+    'next_track': 'ctrl + right',
+    'prev_track': 'ctrl + left',
+    'volume_up': 'ctrl + up',
+    'volume_down': 'ctrl + down',
+    'mute': 'ctrl + m'
+}
+
+# Custom actions driven by the analog knob, not by presses
+KNOB_CONTROLS = ('volume',)
+
+# System actions as hotkeys or hotkey sequences
+SYSTEM_MAP = {
+    'screenshot': 'win + shift + s',
+    'sleep': 'win + x, u, s',  # Sleep via Win+X menu
+    'lock': 'win + l'
+}
+
+def resolve_action(action_config):
+    """
+    Resolve an action configuration to the hotkey it runs.
+    
+    Returns:
+        Dict with hotkey, hold_duration, gap and a description, or a dict
+        with success False and an error
+    """
     action_type = action_config.get('type', 'key')
     action_value = action_config.get('action', '')
     hold_duration = action_config.get('holdDuration', 0.1)
+    gap = action_config.get('sequenceGap', SEQUENCE_GAP)
     
     if not action_value:
         return {"success": False, "error": "No action specified"}
+    if not isinstance(action_value, str):
+        return {"success": False, "error": "action must be a string"}
     
-    try:
-        if action_type == 'hotkey':
-            # Execute hotkey combination
-            run_hotkey(action_value, hold_duration)
-            return {"success": True, "action": f"hotkey: {action_value}"}
-        
-        elif action_type == 'key':
-            # Simple key press (convert to hotkey format if needed)
-            if '+' not in action_value:
-                # Single key
-                run_hotkey(action_value, hold_duration)
-            else:
-                # Key combination (likely already in hotkey format)
-                run_hotkey(action_value, hold_duration)
-            return {"success": True, "action": f"key: {action_value}"}
-        
-        elif action_type == 'multimedia':
-            # Convert multimedia actions to hotkeys
-            multimedia_map = {
-                'play_pause': 'space',  # or use media keys if available
-                'next_track': 'ctrl + right',
-                'prev_track': 'ctrl + left',
-                'volume_up': 'ctrl + up',
-                'volume_down': 'ctrl + down',
-                'mute': 'ctrl + m'
-            }
-            hotkey = multimedia_map.get(action_value, action_value)
-            run_hotkey(hotkey, hold_duration)
-            return {"success": True, "action": f"multimedia: {action_value}"}
-        
-        elif action_type == 'system':
-            # Convert system actions to hotkeys
-            system_map = {
-                'screenshot': 'win + shift + s',
-                'sleep': 'win + x, u, s',  # Sleep via Win+X menu
-                'lock': 'win + l'
-            }
-            hotkey = system_map.get(action_value, action_value)
-            run_hotkey(hotkey, hold_duration)
-            return {"success": True, "action": f"system: {action_value}"}
-        
-        elif action_type == 'custom':
-            # Treat custom actions as hotkey combinations
-            run_hotkey(action_value, hold_duration)
-            return {"success": True, "action": f"custom: {action_value}"}
-        
-        else:
-            return {"success": False, "error": f"Unknown action type: {action_type}"}
+    if action_type in ('hotkey', 'key'):
+        # Single keys and key combinations use the hotkey format directly
+        hotkey = action_value
+    elif action_type == 'multimedia':
+        # Convert multimedia actions to hotkeys
+        hotkey = MULTIMEDIA_MAP.get(action_value, action_value)
+    elif action_type == 'system':
+        # Convert system actions to hotkeys
+        hotkey = SYSTEM_MAP.get(action_value, action_value)
+    elif action_type == 'custom':
+        if action_value in KNOB_CONTROLS:
+            return {"success": False, "error": f"custom: {action_value} is controlled by the analog knob"}
+        # Treat other custom actions as hotkey combinations
+        hotkey = action_value
+    else:
+        return {"success": False, "error": f"Unknown action type: {action_type}"}
+    
+    return {
+        "success": True,
+        "hotkey": hotkey,
+        "hold_duration": hold_duration,
+        "gap": gap,
+        "action": f"{action_type}: {action_value}"
+    }
+
+def execute_action(action_config):
+    """Execute an action based on its configuration"""
+    resolved = resolve_action(action_config)
+    if not resolved["success"]:
+        return resolved
     
+    try:
+        run_hotkey(resolved["hotkey"], resolved["hold_duration"], resolved["gap"])
+        return {"success": True, "action": resolved["action"]}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
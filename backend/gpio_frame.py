@@ -0,0 +1,119 @@
+"""
+GPIO state frame decoding for Stream Deck backend.
+Devices send either the compact binary frame below or the legacy JSON
+document; decode_frame() detects the format from the first byte.
+
+Binary frame (little-endian, 10 bytes):
+
+    offset  size  field
+    0       1     marker (0xD5, never valid as the first byte of JSON)
+    1       1     version (1)
+    2       1     frame type (0 = update, 1 = verify, 2 = keep_alive)
+    3       1     index of the analog channel in gpio_states
+    4       2     sequence number, wraps at 65535
+    6       2     button bitmask, bit i = gpio_states[i]
+    8       2     analog value
+"""
+
+import json
+import struct
+
+FRAME_MARKER = 0xD5
+FRAME_VERSION = 1
+FRAME_STRUCT = struct.Struct('<BBBBHHH')
+FRAME_SIZE = FRAME_STRUCT.size
+NUM_GPIOS = 16
+
+# GPIO pin mapping (adjust based on your ESP32 setup)
+GPIO_PIN_MAP = {
+    0: "d2", 1: "d4", 2: "d5", 3: "d12", 4: "d13", 5: "d14",
+    6: "d15", 7: "d16", 8: "d17", 9: "d18", 10: "d19", 
+    11: "d21", 12: "d25", 13: "d26", 14: "d27", 15: "d33"
+}
+PIN_INDEX = {pin: index for index, pin in GPIO_PIN_MAP.items()}
+
+FORMAT_BINARY = 'binary'
+FORMAT_JSON = 'json'
+
+FRAME_TYPES = ('update', 'verify', 'keep_alive')
+
+
+class FrameError(ValueError):
+    """Raised when a notification cannot be decoded"""
+
+
+def is_binary_frame(data) -> bool:
+    """Return True if the notification payload is a binary GPIO frame"""
+    return len(data) > 0 and data[0] == FRAME_MARKER
+
+
+def decode_binary_frame(data) -> dict:
+    """Decode a binary GPIO frame into the same shape as the JSON document"""
+    if len(data) < FRAME_SIZE:
+        raise FrameError(f"Binary frame too short: {len(data)} bytes")
+
+    _, version, frame_type, analog_index, seq, buttons, analog = FRAME_STRUCT.unpack_from(data)
+    if version != FRAME_VERSION:
+        raise FrameError(f"Unsupported binary frame version: {version}")
+
+    gpio_states = [(buttons >> i) & 1 for i in range(NUM_GPIOS)]
+    if analog_index < NUM_GPIOS:
+        gpio_states[analog_index] = analog
+
+    return {
+        "type": FRAME_TYPES[frame_type] if frame_type < len(FRAME_TYPES) else "update",
+        "seq": seq,
+        "buttons": buttons,
+        "analog": analog,
+        "analog_index": analog_index,
+        "gpio_states": gpio_states,
+    }
+
+
+def pack_button_states(gpio_states) -> int:
+    """Pack a gpio_states list into a button bitmask (bit i set when gpio_states[i] == 1)"""
+    mask = 0
+    bit = 1
+    for state in gpio_states:
+        if state == 1:
+            mask |= bit
+        bit <<= 1
+    return mask
+
+
+def iter_bits(mask: int):
+    """Yield the indices of the set bits in mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def decode_frame(data):
+    """
+    Decode a notification payload.
+
+    Returns:
+        Tuple of (format, message dict)
+    """
+    if is_binary_frame(data):
+        return FORMAT_BINARY, decode_binary_frame(data)
+
+    try:
+        return FORMAT_JSON, json.loads(data.decode('utf-8'))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise FrameError(f"Invalid JSON frame: {e}")
+
+
+def encode_binary_frame(gpio_states, seq=0, analog_index=0, frame_type='update') -> bytes:
+    """Encode GPIO states the way the firmware does (used by tools and benchmarks)"""
+    buttons = 0
+    for i, state in enumerate(gpio_states[:NUM_GPIOS]):
+        if i != analog_index and state:
+            buttons |= 1 << i
+
+    analog = gpio_states[analog_index] if analog_index < len(gpio_states) else 0
+    return FRAME_STRUCT.pack(
+        FRAME_MARKER, FRAME_VERSION, FRAME_TYPES.index(frame_type),
+        analog_index, seq & 0xFFFF, buttons, analog & 0xFFFF
+    )
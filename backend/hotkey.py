@@ -1,57 +1,129 @@
 import time
-from pynput.keyboard import Key, Controller
-from typing import List, Union
+from functools import lru_cache
+from typing import List, Tuple, Union
+
+from key_output import create_output, PRESS, RELEASE, SPECIAL_KEYS
+
+
+# Map key names to the names used in plans; outputs turn those into their own key events
+KEY_MAPPING = {
+    # Modifier keys
+    'control': 'ctrl',
+    'win': 'cmd',
+    'windows': 'cmd',
+    
+    # Special keys
+    'comma': ',',  # ',' itself separates the chords of a sequence
+    'plus': '+',  # '+' itself joins the keys of a chord
+    'return': 'enter',
+    'escape': 'esc',
+    
+    # ctrl, shift, alt, cmd, space, enter, tab, esc, arrows, f1-f12, ...
+    **{name: name for name in SPECIAL_KEYS},
+}
+
+# Number of distinct hotkey strings whose compiled plans are kept
+PLAN_CACHE_SIZE = 256
+
+# Pause between the chords of a sequence like 'win + x, u, s'
+SEQUENCE_GAP = 0.05
+
+
+class KeyPlan:
+    """
+    A hotkey compiled into a sequence of chords.
+    
+    Each step holds the keys to press, in order, and the order to release
+    them. 'ctrl + c' is one step; 'win + x, u, s' is three.
+    """
+    
+    __slots__ = ('hotkey', 'steps', 'timelines')
+    
+    def __init__(self, hotkey: str, chords: List[List[str]]):
+        self.hotkey = hotkey
+        self.steps = tuple((tuple(keys), tuple(reversed(keys))) for keys in chords if keys)
+        self.timelines = {}  # (hold_duration, gap) -> timeline
+    
+    def __bool__(self):
+        return bool(self.steps)
+    
+    def __repr__(self):
+        return f"KeyPlan({self.hotkey!r})"
+    
+    @property
+    def keys(self) -> List[str]:
+        """All keys in press order"""
+        return [key for press, _ in self.steps for key in press]
+    
+    def timeline(self, hold_duration: float = 0.1, gap: float = SEQUENCE_GAP) -> List[Tuple[float, str, str]]:
+        """
+        Turn the plan into (offset in seconds, PRESS/RELEASE, key) events.
+        
+        Each chord is held for hold_duration, and the next chord starts gap
+        seconds after the previous one was released.
+        """
+        timeline = self.timelines.get((hold_duration, gap))
+        if timeline is not None:
+            return timeline
+        
+        events = []
+        offset = 0.0
+        for press, release in self.steps:
+            events.extend((offset, PRESS, key) for key in press)
+            offset += hold_duration
+            events.extend((offset, RELEASE, key) for key in release)
+            offset += gap
+        
+        # Actions use a handful of durations, keep a few timelines per plan
+        if len(self.timelines) < 8:
+            self.timelines[(hold_duration, gap)] = events
+        return events
+
+
+def parse_key(key_part: str) -> Union[str, None]:
+    """Resolve one key name to a special key name or a character"""
+    key_part = key_part.strip().lower()
+    if key_part in KEY_MAPPING:
+        return KEY_MAPPING[key_part]
+    # Assume it's a regular character
+    return key_part or None
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def compile_hotkey(hotkey_string: str) -> KeyPlan:
+    """
+    Compile a hotkey string into a KeyPlan. Results are cached per string.
+    
+    Args:
+        hotkey_string: Chords separated by ',' with keys joined by '+',
+            like 'shift + b', 'ctrl + alt + delete' or 'win + x, u, s'
+    """
+    chords = []
+    for chord in hotkey_string.split(','):
+        keys = [parse_key(part) for part in chord.split('+')]
+        chords.append([key for key in keys if key is not None])
+    
+    return KeyPlan(hotkey_string, chords)
 
 
 class HotkeyRunner:
     """
     A class to run hotkeys based on string input.
     
+    Key events go to a key output (see key_output.py), the one configured
+    in hotkey_config.json unless given.
+    
     Example usage:
         hotkey_runner = HotkeyRunner()
         hotkey_runner.run_hotkey('shift + b')
         hotkey_runner.run_hotkey('ctrl + space')
     """
     
-    def __init__(self):
-        self.keyboard = Controller()
-        
-        # Map string representations to pynput Key objects
-        self.key_mapping = {
-            # Modifier keys
-            'ctrl': Key.ctrl,
-            'control': Key.ctrl,
-            'shift': Key.shift,
-            'alt': Key.alt,
-            'cmd': Key.cmd,
-            'win': Key.cmd,
-            'windows': Key.cmd,
-            
-            # Special keys
-            'space': Key.space,
-            'enter': Key.enter,
-            'return': Key.enter,
-            'tab': Key.tab,
-            'esc': Key.esc,
-            'escape': Key.esc,
-            'backspace': Key.backspace,
-            'delete': Key.delete,
-            'home': Key.home,
-            'end': Key.end,
-            'page_up': Key.page_up,
-            'page_down': Key.page_down,
-            'up': Key.up,
-            'down': Key.down,
-            'left': Key.left,
-            'right': Key.right,
-            
-            # Function keys
-            'f1': Key.f1, 'f2': Key.f2, 'f3': Key.f3, 'f4': Key.f4,
-            'f5': Key.f5, 'f6': Key.f6, 'f7': Key.f7, 'f8': Key.f8,
-            'f9': Key.f9, 'f10': Key.f10, 'f11': Key.f11, 'f12': Key.f12,
-        }
+    def __init__(self, output=None):
+        self.keyboard = output or create_output()
+        self.key_mapping = KEY_MAPPING
     
-    def parse_hotkey(self, hotkey_string: str) -> List[Union[Key, str]]:
+    def parse_hotkey(self, hotkey_string: str) -> List[str]:
         """
         Parse a hotkey string into a list of keys.
         
@@ -59,67 +131,77 @@ class HotkeyRunner:
             hotkey_string: String like 'shift + b' or 'ctrl + alt + delete'
             
         Returns:
-            List of Key objects and character strings
+            List of special key names and characters
         """
-        # Split by '+' and strip whitespace
-        key_parts = [part.strip().lower() for part in hotkey_string.split('+')]
-        
-        parsed_keys = []
-        for key_part in key_parts:
-            if key_part in self.key_mapping:
-                parsed_keys.append(self.key_mapping[key_part])
-            else:
-                # Assume it's a regular character
-                parsed_keys.append(key_part)
-        
-        return parsed_keys
+        return compile_hotkey(hotkey_string).keys
     
-    def run_hotkey(self, hotkey_string: str, hold_duration: float = 0.1):
+    def run_hotkey(self, hotkey_string: str, hold_duration: float = 0.1, gap: float = SEQUENCE_GAP):
         """
-        Execute a hotkey combination.
+        Execute a hotkey combination or sequence.
         
         Args:
             hotkey_string: String representation of the hotkey (e.g., 'shift + b')
             hold_duration: How long to hold the keys in seconds
+            gap: Pause between the chords of a sequence in seconds
+        """
+        self.run_plan(compile_hotkey(hotkey_string), hold_duration, gap)
+    
+    def run_plan(self, plan: KeyPlan, hold_duration: float = 0.1, gap: float = SEQUENCE_GAP):
         """
-        keys = self.parse_hotkey(hotkey_string)
+        Execute a compiled hotkey plan, blocking the calling thread.
         
-        if not keys:
-            print(f"Warning: No keys found in hotkey string '{hotkey_string}'")
-            return
+        Raises ValueError for a plan without keys and passes on errors of
+        the key output, after releasing the keys that were pressed.
         
+        Args:
+            plan: KeyPlan from compile_hotkey()
+            hold_duration: How long to hold the keys in seconds
+            gap: Pause between the chords of a sequence in seconds
+        """
+        if not plan:
+            raise ValueError(f"No keys found in hotkey string '{plan.hotkey}'")
+        
+        pressed = []
         try:
-            # Press all keys
-            for key in keys:
-                self.keyboard.press(key)
-            
-            # Hold for the specified duration
-            time.sleep(hold_duration)
-            
-            # Release all keys in reverse order
-            for key in reversed(keys):
-                self.keyboard.release(key)
+            start = time.perf_counter()
+            for offset, kind, key in plan.timeline(hold_duration, gap):
+                delay = start + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
                 
-        except Exception as e:
-            print(f"Error executing hotkey '{hotkey_string}': {e}")
+                if kind == PRESS:
+                    self.keyboard.press(key)
+                    pressed.append(key)
+                else:
+                    self.keyboard.release(key)
+                    pressed.remove(key)
+        finally:
             # Make sure to release any pressed keys
-            for key in reversed(keys):
+            for key in reversed(pressed):
                 try:
                     self.keyboard.release(key)
-                except:
+                except Exception:
                     pass
 
+_shared_runner = None
+
+
+def get_runner() -> HotkeyRunner:
+    """Return the process-wide HotkeyRunner, creating it on first use"""
+    global _shared_runner
+    if _shared_runner is None:
+        _shared_runner = HotkeyRunner()
+    return _shared_runner
+
 
 # Convenience function for direct use
-def run_hotkey(hotkey_string: str, hold_duration: float = 0.1):
+def run_hotkey(hotkey_string: str, hold_duration: float = 0.1, gap: float = SEQUENCE_GAP):
     """
     Convenience function to run a hotkey without creating a class instance.
     
     Args:
         hotkey_string: String representation of the hotkey (e.g., 'shift + b')
         hold_duration: How long to hold the keys in seconds
+        gap: Pause between the chords of a sequence in seconds
     """
-    runner = HotkeyRunner()
-    runner.run_hotkey(hotkey_string, hold_duration)
-
-
+    get_runner().run_hotkey(hotkey_string, hold_duration, gap)
@@ -0,0 +1,198 @@
+"""
+Keystroke output backends for Stream Deck backend.
+Hotkey plans name their keys ('ctrl', 'f5', 'c'); an output turns those
+names into key events for one injection method:
+
+    pynput    - pynput's keyboard Controller (Windows, macOS, X11)
+    uinput    - Linux virtual keyboard through evdev, also works on Wayland and the console
+    null      - Drops every event, to time the code around it
+    recording - Keeps timestamped events, optionally passing them on to another output
+
+pynput and evdev are only imported when their output is created.
+"""
+
+import json
+import os
+import time
+
+OUTPUT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hotkey_config.json')
+DEFAULT_OUTPUT = 'pynput'
+
+# Timeline event kinds
+PRESS = 'press'
+RELEASE = 'release'
+
+# Names of the non-character keys a plan can contain, as used by pynput's Key
+SPECIAL_KEYS = (
+    'ctrl', 'shift', 'alt', 'cmd',
+    'space', 'enter', 'tab', 'esc', 'backspace', 'delete', 'home', 'end', 'page_up', 'page_down',
+    'up', 'down', 'left', 'right',
+    'f1', 'f2', 'f3', 'f4', 'f5', 'f6', 'f7', 'f8', 'f9', 'f10', 'f11', 'f12',
+)
+
+
+class PynputOutput:
+    """Key events through pynput's keyboard Controller"""
+
+    name = 'pynput'
+
+    def __init__(self):
+        from pynput.keyboard import Controller, Key
+
+        self.controller = Controller()
+        self.keys = {name: getattr(Key, name) for name in SPECIAL_KEYS}
+
+    def press(self, key: str):
+        self.controller.press(self.keys.get(key, key))
+
+    def release(self, key: str):
+        self.controller.release(self.keys.get(key, key))
+
+
+# evdev key codes of the special keys and of characters on a US layout
+UINPUT_KEYS = {
+    'ctrl': 'KEY_LEFTCTRL', 'shift': 'KEY_LEFTSHIFT', 'alt': 'KEY_LEFTALT', 'cmd': 'KEY_LEFTMETA',
+    'space': 'KEY_SPACE', 'enter': 'KEY_ENTER', 'tab': 'KEY_TAB', 'esc': 'KEY_ESC',
+    'backspace': 'KEY_BACKSPACE', 'delete': 'KEY_DELETE', 'home': 'KEY_HOME', 'end': 'KEY_END',
+    'page_up': 'KEY_PAGEUP', 'page_down': 'KEY_PAGEDOWN',
+    'up': 'KEY_UP', 'down': 'KEY_DOWN', 'left': 'KEY_LEFT', 'right': 'KEY_RIGHT',
+    **{f'f{n}': f'KEY_F{n}' for n in range(1, 13)},
+    **{c: f'KEY_{c.upper()}' for c in 'abcdefghijklmnopqrstuvwxyz0123456789'},
+    ' ': 'KEY_SPACE', '-': 'KEY_MINUS', '=': 'KEY_EQUAL', '[': 'KEY_LEFTBRACE', ']': 'KEY_RIGHTBRACE',
+    ';': 'KEY_SEMICOLON', "'": 'KEY_APOSTROPHE', '`': 'KEY_GRAVE', '\\': 'KEY_BACKSLASH',
+    ',': 'KEY_COMMA', '.': 'KEY_DOT', '/': 'KEY_SLASH',
+}
+
+# Characters typed with shift held, and the unshifted key they are on
+UINPUT_SHIFTED = {
+    '+': '=', '_': '-', '{': '[', '}': ']', ':': ';', '"': "'", '~': '`', '|': '\\', '<': ',', '>': '.',
+    '?': '/', '!': '1', '@': '2', '#': '3', '$': '4', '%': '5', '^': '6', '&': '7', '*': '8', '(': '9',
+    ')': '0',
+}
+
+
+class UinputOutput:
+    """
+    Key events through a Linux uinput virtual keyboard.
+
+    Needs evdev and write access to /dev/uinput (e.g. membership of the
+    input group). Characters are mapped for a US layout.
+    """
+
+    name = 'uinput'
+
+    def __init__(self, device_name: str = 'streamdeck-keyboard'):
+        from evdev import UInput, ecodes
+
+        self.ecodes = ecodes
+        self.codes = {key: getattr(ecodes, code) for key, code in UINPUT_KEYS.items()}
+        self.shift = self.codes['shift']
+        self.device = UInput({ecodes.EV_KEY: sorted(set(self.codes.values()))}, name=device_name)
+
+    def resolve(self, key: str):
+        """(key code, needs shift) of a key name"""
+        if key in UINPUT_SHIFTED:
+            return self.codes[UINPUT_SHIFTED[key]], True
+        code = self.codes.get(key)
+        if code is None:
+            raise ValueError(f"No uinput key code for '{key}'")
+        return code, False
+
+    def write(self, code, value):
+        self.device.write(self.ecodes.EV_KEY, code, value)
+
+    def press(self, key: str):
+        code, shifted = self.resolve(key)
+        if shifted:
+            self.write(self.shift, 1)
+        self.write(code, 1)
+        self.device.syn()
+
+    def release(self, key: str):
+        code, shifted = self.resolve(key)
+        self.write(code, 0)
+        if shifted:
+            self.write(self.shift, 0)
+        self.device.syn()
+
+    def close(self):
+        self.device.close()
+
+
+class NullOutput:
+    """Drops every key event"""
+
+    name = 'null'
+
+    def press(self, key: str):
+        pass
+
+    def release(self, key: str):
+        pass
+
+
+class RecordingOutput:
+    """
+    Records (time.perf_counter(), PRESS/RELEASE, key) for every event.
+
+    Events are passed on to output if one is given, so the real timing of
+    any output can be recorded too.
+
+    Example usage:
+        recording = RecordingOutput()
+        HotkeyRunner(recording).run_hotkey('ctrl + c', hold_duration=0.05)
+        print(recording.timeline())  # [(0.0, 'press', 'ctrl'), (0.0, 'press', 'c'), (0.05, 'release', 'c'), ...]
+    """
+
+    name = 'recording'
+
+    def __init__(self, output=None):
+        self.output = output
+        self.events = []
+
+    def press(self, key: str):
+        if self.output is not None:
+            self.output.press(key)
+        self.events.append((time.perf_counter(), PRESS, key))
+
+    def release(self, key: str):
+        if self.output is not None:
+            self.output.release(key)
+        self.events.append((time.perf_counter(), RELEASE, key))
+
+    def timeline(self) -> list:
+        """Recorded events with times in seconds since the first one, like KeyPlan.timeline()"""
+        if not self.events:
+            return []
+        start = self.events[0][0]
+        return [(at - start, kind, key) for at, kind, key in self.events]
+
+    def clear(self):
+        self.events.clear()
+
+
+OUTPUTS = {
+    'pynput': PynputOutput,
+    'uinput': UinputOutput,
+    'null': NullOutput,
+    'recording': RecordingOutput,
+}
+
+
+def load_output_name(path: str = OUTPUT_CONFIG) -> str:
+    """Output named in hotkey_config.json, or the default for a missing or invalid file"""
+    try:
+        with open(path, 'r') as f:
+            config = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return DEFAULT_OUTPUT
+    output = config.get('output') if isinstance(config, dict) else None
+    return output if isinstance(output, str) else DEFAULT_OUTPUT
+
+
+def create_output(name: str = None):
+    """Create a key output by name, or the one configured in hotkey_config.json"""
+    name = name or load_output_name()
+    if name not in OUTPUTS:
+        raise ValueError(f"Unknown key output: {name}")
+    return OUTPUTS[name]()
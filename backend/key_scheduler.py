@@ -0,0 +1,78 @@
+"""
+Asyncio key scheduler for Stream Deck backend.
+Plays hotkey timelines on the event loop, so holds and multi-step
+sequences wait on timers instead of occupying a thread each.
+"""
+
+import asyncio
+
+from hotkey import compile_hotkey, get_runner, KeyPlan, PRESS, SEQUENCE_GAP
+
+
+class KeyScheduler:
+    """
+    Runs compiled hotkey plans as timelines of press/release events.
+
+    Any number of holds can be in flight at once on one loop. Keys pressed
+    by a cancelled or failed plan are released.
+
+    Example usage:
+        scheduler = KeyScheduler()
+        await scheduler.run_hotkey('win + x, u, s', hold_duration=0.05)
+    """
+
+    def __init__(self, keyboard=None):
+        # Share the process-wide key output unless one is given. It is created
+        # on the first key event, so a missing pynput or display only fails
+        # the presses that need it.
+        self.keyboard = keyboard
+        self.keyboard_error = None  # Why the key output couldn't be created
+        self.active = 0
+
+    def output(self):
+        """Key output to play events on, raising RuntimeError if it can't be created"""
+        if self.keyboard is None:
+            if self.keyboard_error is not None:
+                # Already failed, don't retry the import on every press
+                raise RuntimeError(self.keyboard_error)
+            try:
+                self.keyboard = get_runner().keyboard
+            except Exception as e:
+                self.keyboard_error = f"Key output unavailable: {e}"
+                raise RuntimeError(self.keyboard_error) from e
+        return self.keyboard
+
+    async def run_hotkey(self, hotkey_string: str, hold_duration: float = 0.1, gap: float = SEQUENCE_GAP):
+        """Execute a hotkey combination or sequence without blocking the loop"""
+        await self.run_plan(compile_hotkey(hotkey_string), hold_duration, gap)
+
+    async def run_plan(self, plan: KeyPlan, hold_duration: float = 0.1, gap: float = SEQUENCE_GAP):
+        """Execute a compiled plan, sleeping on the loop between events"""
+        if not plan:
+            raise ValueError(f"No keys found in hotkey string '{plan.hotkey}'")
+
+        keyboard = self.output()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        pressed = []
+        self.active += 1
+        try:
+            for offset, kind, key in plan.timeline(hold_duration, gap):
+                delay = start + offset - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                if kind == PRESS:
+                    keyboard.press(key)
+                    pressed.append(key)
+                else:
+                    keyboard.release(key)
+                    pressed.remove(key)
+        finally:
+            self.active -= 1
+            # Make sure to release any pressed keys
+            for key in reversed(pressed):
+                try:
+                    keyboard.release(key)
+                except Exception:
+                    pass
@@ -0,0 +1,115 @@
+"""
+Known device registry for Stream Deck backend.
+Remembers previously paired devices so the scanner can reconnect to them
+directly instead of waiting for them to show up in a scan.
+"""
+
+import json
+import os
+import threading
+import time
+
+from config_cache import write_json_atomic
+
+REGISTRY_FILE = os.path.join(os.path.dirname(__file__), '..', 'configs', 'known_devices.json')
+
+# Seconds changes wait before the registry is written, so connects never wait on the disk
+SAVE_DEBOUNCE = 1.0
+
+# Devices not seen for this long are forgotten
+MAX_AGE = 30 * 24 * 3600
+
+
+class KnownDeviceRegistry:
+    """
+    Persisted map of device address -> last-seen metadata.
+
+    Changes are written by a timer thread `debounce` seconds after the
+    first one, so remember() and seen() can be called from the event loop.
+    flush() writes pending changes right away, e.g. on shutdown.
+
+    Example usage:
+        registry = KnownDeviceRegistry()
+        registry.remember('00:4B:12:3B:31:82', 'ESP32_Streamdeck_ESP32_001')
+        for address in registry.addresses():
+            ...
+    """
+
+    def __init__(self, path: str = REGISTRY_FILE, debounce: float = SAVE_DEBOUNCE):
+        self.path = path
+        self.debounce = debounce
+        self.devices = self.load()
+        self.lock = threading.Lock()  # Guards devices and timer
+        self.write_lock = threading.Lock()  # Keeps writes in order
+        self.timer = None
+        self.dirty = False
+
+    def load(self) -> dict:
+        """Load the registry from disk, starting empty if it is missing or invalid"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('devices', {})
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            return {}
+
+    def save(self):
+        """Write the registry after the debounce time; call with the lock held"""
+        self.dirty = True
+        if self.timer is None:
+            self.timer = threading.Timer(self.debounce, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """Write pending changes to disk now"""
+        with self.write_lock:
+            with self.lock:
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+                if not self.dirty:
+                    return
+                self.dirty = False
+                snapshot = {address: dict(entry) for address, entry in self.devices.items()}
+            write_json_atomic(self.path, {"devices": snapshot})
+
+    def addresses(self) -> list:
+        """Known addresses, most recently seen first"""
+        with self.lock:
+            return sorted(self.devices, key=lambda a: self.devices[a].get('last_seen', 0), reverse=True)
+
+    def get(self, address: str) -> dict:
+        return self.devices.get(address, {})
+
+    def __contains__(self, address):
+        return address in self.devices
+
+    def remember(self, address: str, name: str = None):
+        """Record a successful connection"""
+        now = time.time()
+        with self.lock:
+            entry = self.devices.setdefault(address, {"first_paired": now, "connections": 0})
+            if name:
+                entry["name"] = name
+            entry["last_seen"] = now
+            entry["connections"] = entry.get("connections", 0) + 1
+            self.save()
+
+    def seen(self, address: str):
+        """Update the last-seen time of a known device, e.g. when it disconnects"""
+        with self.lock:
+            entry = self.devices.get(address)
+            if entry is not None:
+                entry["last_seen"] = time.time()
+                self.save()
+
+    def prune(self, max_age: float = MAX_AGE) -> list:
+        """Forget devices not seen for max_age seconds, returning their addresses"""
+        cutoff = time.time() - max_age
+        with self.lock:
+            stale = [address for address, entry in self.devices.items() if entry.get('last_seen', 0) < cutoff]
+            for address in stale:
+                del self.devices[address]
+            if stale:
+                self.save()
+        return stale
@@ -0,0 +1,88 @@
+"""
+Device liveness tracking for Stream Deck backend.
+Keeps one deadline per connected device in a heap and expires devices that
+stop sending notifications, without sweeping every device periodically.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+
+
+class LivenessTracker:
+    """
+    Deadline heap driven by its own task.
+
+    touch() only records the last-seen time, so it is cheap enough to call
+    for every notification. The heap holds one entry per tracked device; when
+    an entry comes due and the device was seen since, it is rescheduled.
+
+    Example usage:
+        tracker = LivenessTracker(timeout=15, on_expire=handle_stale_device)
+        asyncio.create_task(tracker.run())
+        tracker.touch('00:4B:12:3B:31:82')
+    """
+
+    def __init__(self, timeout: float, on_expire):
+        self.timeout = timeout
+        self.on_expire = on_expire  # Coroutine function called with the address
+        self.last_seen = {}  # address -> (last seen time, generation)
+        self.heap = []  # (deadline, generation, address)
+        self.generations = itertools.count()
+        self.wakeup = asyncio.Event()
+
+    def __len__(self):
+        return len(self.last_seen)
+
+    def __contains__(self, address):
+        return address in self.last_seen
+
+    def touch(self, address: str):
+        """Record activity for a device, starting to track it if needed"""
+        now = time.monotonic()
+        entry = self.last_seen.get(address)
+        if entry is not None:
+            self.last_seen[address] = (now, entry[1])
+            return
+
+        generation = next(self.generations)
+        self.last_seen[address] = (now, generation)
+        heapq.heappush(self.heap, (now + self.timeout, generation, address))
+        self.wakeup.set()
+
+    def remove(self, address: str):
+        """Stop tracking a device; its heap entry is dropped when it comes due"""
+        self.last_seen.pop(address, None)
+
+    async def run(self):
+        """Expire stale devices until cancelled"""
+        while True:
+            if not self.heap:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            deadline, generation, address = self.heap[0]
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                # New devices always get the latest deadline, so nothing can jump the queue
+                await asyncio.sleep(delay)
+                continue
+
+            heapq.heappop(self.heap)
+            entry = self.last_seen.get(address)
+            if entry is None or entry[1] != generation:
+                # Device was removed (and possibly re-added) since this entry was pushed
+                continue
+
+            last_seen = entry[0]
+            if last_seen + self.timeout > time.monotonic():
+                heapq.heappush(self.heap, (last_seen + self.timeout, generation, address))
+                continue
+
+            del self.last_seen[address]
+            try:
+                await self.on_expire(address)
+            except Exception:
+                pass
@@ -1,15 +1,10 @@
 import sys
 import json
-import os
+import copy
+from config_cache import get_config_cache
 
 def load_device_config(device_id):
     """Load configuration for a specific device"""
-    config_dir = os.path.join(os.path.dirname(__file__), '..', 'configs')
-    config_file = os.path.join(config_dir, f'{device_id}.json')
-    
-    # Create config directory if it doesn't exist
-    os.makedirs(config_dir, exist_ok=True)
-    
     # Default configuration
     default_config = {
         "id": device_id,
@@ -37,26 +32,25 @@ def load_device_config(device_id):
     
     try:
         # Try to load existing config
-        if os.path.exists(config_file):
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                # Merge with defaults to ensure all required fields exist
-                for key in default_config:
-                    if key not in config:
-                        config[key] = default_config[key]
-                
-                # Fix invalid action types in existing configs
-                for gpio, gpio_config in config.get('gpios', {}).items():
-                    if gpio_config.get('type') == 'button':
-                        gpio_config['type'] = 'key'
-                    if gpio_config.get('type') == 'rotary':
-                        gpio_config['type'] = 'custom'
-                
-                return config
+        cached = get_config_cache().get(device_id)
+        if cached is not None:
+            # Cached configs are shared, work on a copy
+            config = copy.deepcopy(cached)
+            # Merge with defaults to ensure all required fields exist
+            for key in default_config:
+                if key not in config:
+                    config[key] = default_config[key]
+            
+            # Fix invalid action types in existing configs
+            for gpio, gpio_config in config.get('gpios', {}).items():
+                if gpio_config.get('type') == 'button':
+                    gpio_config['type'] = 'key'
+                if gpio_config.get('type') == 'rotary':
+                    gpio_config['type'] = 'custom'
+            
+            return config
         else:
-            # Create default config file
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(default_config, f, indent=2)
+            # No valid config stored; reading doesn't create one, the first save or patch does
             return default_config
             
     except Exception as e:
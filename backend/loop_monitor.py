@@ -0,0 +1,51 @@
+"""
+Event loop lag monitor for Stream Deck backend.
+Measures how late the asyncio loop wakes up a periodic timer, which shows
+whether anything is blocking BLE notification handling.
+"""
+
+import asyncio
+import time
+
+
+class LoopLagMonitor:
+    """
+    Samples event loop lag by sleeping for a fixed interval and measuring
+    how much later than requested the loop resumes the task.
+
+    Example usage:
+        monitor = LoopLagMonitor(interval=0.1)
+        asyncio.create_task(monitor.run())
+        print(monitor.snapshot())
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    async def run(self):
+        """Sample loop lag until cancelled"""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+
+            self.samples += 1
+            self.total_lag += lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+
+    def snapshot(self, reset: bool = True) -> dict:
+        """Return lag statistics in milliseconds, optionally starting a new window"""
+        stats = {
+            "samples": self.samples,
+            "avg_lag_ms": round(self.total_lag / self.samples * 1000, 3) if self.samples else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+        }
+        if reset:
+            self.samples = 0
+            self.total_lag = 0.0
+            self.max_lag = 0.0
+        return stats
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Per-GPIO config patches for Stream Deck backend.
+Merges a partial action into one pin of a cached device config and saves
+it, so changing one button doesn't send, parse or rebuild the whole config.
+
+Usage:
+    echo '{"action": "ctrl + c"}' | python patch_config.py <device_id> <gpio> [page]
+"""
+
+import json
+import sys
+
+from action_table import compile_action, DEFAULT_PAGE
+from config_cache import get_config_cache
+from gpio_frame import PIN_INDEX
+from load_config import load_device_config
+from save_config import config_update_lock, store_config
+
+
+def merge_action(current, changes):
+    """
+    Merge changes into an action config, returning a new dict.
+
+    Keys set to None are removed from the action; changes of None removes
+    the whole action.
+    """
+    if changes is None:
+        return None
+
+    merged = dict(current) if isinstance(current, dict) else {}
+    for key, value in changes.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = value
+    return merged
+
+
+def patch_device_config(device_id, gpio, action, writer=None, page=None):
+    """Merge a partial action into one GPIO of a device config (or one of its pages) and save it"""
+    try:
+        # Parse the action if it's a string
+        if isinstance(action, str):
+            action = json.loads(action)
+        if action is not None and not isinstance(action, dict):
+            return {"success": False, "error": "action must be an object or null"}
+        if gpio not in PIN_INDEX:
+            return {"success": False, "error": f"Unknown GPIO pin: {gpio}"}
+
+        with config_update_lock:
+            config = get_config_cache().get(device_id)
+            if not isinstance(config, dict):
+                # No valid config saved yet, start from the defaults
+                config = load_device_config(device_id)
+
+            if page in (None, DEFAULT_PAGE):
+                holder = config
+            else:
+                pages = config.get('pages')
+                pages = pages if isinstance(pages, dict) else {}
+                holder = pages.get(page)
+                holder = holder if isinstance(holder, dict) else {}
+
+            gpios = holder.get('gpios')
+            if not isinstance(gpios, dict):
+                gpios = {}
+            merged = merge_action(gpios.get(gpio), action)
+
+            # Cached configs are shared, so replace the maps on the way down to
+            # the pin but keep every other action object as it is
+            gpios = dict(gpios)
+            if merged is None:
+                gpios.pop(gpio, None)
+            else:
+                gpios[gpio] = merged
+
+            if page in (None, DEFAULT_PAGE):
+                config = {**config, 'gpios': gpios}
+            else:
+                config = {**config, 'pages': {**pages, page: {**holder, 'gpios': gpios}}}
+            write_warning = store_config(device_id, config, writer)
+
+        result = {"success": True, "message": f"GPIO {gpio} updated for device {device_id}", "gpio": gpio, "action": merged}
+
+        # Only the patched pin can have new problems
+        warnings = []
+        if merged is not None:
+            error = compile_action(gpio, PIN_INDEX[gpio], merged)[1]
+            if error:
+                warnings.append(error)
+        if write_warning:
+            warnings.append(write_warning)
+        if warnings:
+            result["warnings"] = warnings
+        return result
+
+    except json.JSONDecodeError as e:
+        return {"success": False, "error": f"Invalid JSON format: {str(e)}"}
+    except Exception as e:
+        return {"success": False, "error": f"Failed to update configuration: {str(e)}"}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        print(json.dumps({"success": False, "error": "Usage: patch_config.py <device_id> <gpio> [page] (action JSON on stdin)"}))
+        sys.exit(1)
+
+    page = sys.argv[3] if len(sys.argv) == 4 else None
+    result = patch_device_config(sys.argv[1], sys.argv[2], sys.stdin.read(), page=page)
+    print(json.dumps(result))
@@ -1,26 +1,184 @@
 import sys
 import json
-import os
+import threading
+from config_cache import get_config_cache
+from action_table import compile_config
 
-def save_device_config(device_id, config_data):
-    """Save configuration for a specific device"""
+# Seconds a save waits for newer saves of the same device before it is written
+SAVE_DEBOUNCE = 0.25
+# Delay before retrying a failed write, doubled per failure
+RETRY_DELAY = 1.0
+RETRY_DELAY_MAX = 30.0
+
+# Whole-config saves and patches (read, modify, replace) of the cached configs
+# run one at a time, so neither overwrites the other's update
+config_update_lock = threading.Lock()
+
+
+class ConfigWriter:
+    """
+    Debounced write-behind for device configs.
+
+    save() caches the config right away and schedules the file write; saves
+    of the same device that arrive before the write replace the pending
+    config, so a burst of edits costs one write at most `debounce` seconds
+    after its first save. flush() writes everything pending, e.g. on shutdown.
+
+    A config whose write fails (e.g. the file is open in another process on
+    Windows) stays pending and is retried with backoff until a write
+    succeeds or a newer save replaces it; errors() lists the failing devices.
+
+    Example usage:
+        writer = get_config_writer()
+        writer.save('00-4b-12-3b-31-82', config)
+        writer.flush()
+    """
+
+    def __init__(self, debounce: float = SAVE_DEBOUNCE, cache=None):
+        self.debounce = debounce
+        self.cache = cache or get_config_cache()
+        self.pending = {}  # device_id -> config waiting to be written
+        self.timers = {}  # device_id -> threading.Timer
+        self.lock = threading.Lock()  # Guards pending and timers; never held during a write
+        self.write_lock = threading.Lock()  # Keeps writes in order
+        self.saves = 0
+        self.writes = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.failures = {}  # device_id -> (consecutive failed writes, last error) until a write succeeds
+
+    def save(self, device_id: str, config: dict):
+        """Cache a config now and write it to disk after the debounce window"""
+        with self.lock:
+            # Readers in this process see the new config right away, others once it is written
+            self.cache.store(device_id, config)
+            self.saves += 1
+            if device_id in self.pending:
+                self.coalesced += 1
+            self.pending[device_id] = config
+            self.schedule(device_id, self.debounce)
+
+    def schedule(self, device_id: str, delay: float):
+        """Start the write timer of a device unless it has one; call with lock held"""
+        if device_id not in self.timers:
+            timer = threading.Timer(delay, self.flush_device, (device_id,))
+            timer.daemon = True
+            self.timers[device_id] = timer
+            timer.start()
+
+    def write(self, device_id: str, config: dict):
+        """Write one config file atomically, keeping it pending on failure; call with write_lock held"""
+        try:
+            # Also picks up the new signature so a poll doesn't reload our own write
+            self.cache.save(device_id, config)
+        except Exception as e:
+            print(json.dumps({"error": f"Failed to write configuration for device {device_id}: {str(e)}"}), file=sys.stderr)
+            with self.lock:
+                self.failed += 1
+                count = self.failures.get(device_id, (0, None))[0] + 1
+                self.failures[device_id] = (count, str(e))
+                # A newer save replaces the config and brings its own timer
+                if device_id not in self.pending:
+                    self.pending[device_id] = config
+                    self.schedule(device_id, min(RETRY_DELAY_MAX, RETRY_DELAY * 2 ** (count - 1)))
+            return
+        with self.lock:
+            self.writes += 1
+            self.failures.pop(device_id, None)
+
+    def flush_device(self, device_id: str):
+        """Write the pending config of one device, if any"""
+        with self.write_lock:
+            # Saves only wait for taking the config, not for the disk
+            with self.lock:
+                self.timers.pop(device_id, None)
+                config = self.pending.pop(device_id, None)
+            if config is not None:
+                self.write(device_id, config)
+
+    def flush(self):
+        """Cancel the timers and write every pending config now; failed ones stay pending"""
+        with self.write_lock:
+            with self.lock:
+                for timer in self.timers.values():
+                    timer.cancel()
+                self.timers.clear()
+                pending, self.pending = self.pending, {}
+            for device_id, config in pending.items():
+                self.write(device_id, config)
+
+    def errors(self) -> dict:
+        """device_id -> last write error of every config still waiting for a successful write"""
+        with self.lock:
+            return {device_id: error for device_id, (_, error) in self.failures.items()}
+
+    def stats(self) -> dict:
+        return {
+            "saves": self.saves,
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "pending": len(self.pending),
+            "errors": self.errors(),
+        }
+
+
+_shared_writer = None
+
+
+def get_config_writer() -> ConfigWriter:
+    """Return the process-wide ConfigWriter, creating it on first use"""
+    global _shared_writer
+    if _shared_writer is None:
+        _shared_writer = ConfigWriter()
+    return _shared_writer
+
+
+def store_config(device_id, config, writer=None):
+    """
+    Write a config through the writer, or straight to disk without one.
+
+    Returns a warning if earlier writes of the device through the writer
+    failed and are still being retried, else None.
+    """
+    if writer is not None:
+        writer.save(device_id, config)
+        error = writer.errors().get(device_id)
+        if error is not None:
+            return f"Configuration for device {device_id} is not written to disk yet, retrying: {error}"
+        return None
+
+    # Readers in this process see the new config right away, others on their next poll
+    get_config_cache().save(device_id, config)
+
+
+def save_device_config(device_id, config_data, writer=None):
+    """
+    Save configuration for a specific device.
+
+    Without a writer the file is written before returning; with one the
+    write is deferred to the writer.
+    """
     try:
-        config_dir = os.path.join(os.path.dirname(__file__), '..', 'configs')
-        config_file = os.path.join(config_dir, f'{device_id}.json')
-        
-        # Create config directory if it doesn't exist
-        os.makedirs(config_dir, exist_ok=True)
-        
         # Parse config data if it's a string
         if isinstance(config_data, str):
             config_data = json.loads(config_data)
-        
-        # Save the config
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(config_data, f, indent=2)
-        
-        return {"success": True, "message": f"Configuration saved for device {device_id}"}
-        
+        if not isinstance(config_data, dict):
+            return {"success": False, "error": "Configuration must be a JSON object"}
+
+        with config_update_lock:
+            write_warning = store_config(device_id, config_data, writer)
+
+        result = {"success": True, "message": f"Configuration saved for device {device_id}"}
+
+        # Report actions that won't run, instead of failing silently on press
+        warnings = list(compile_config(device_id, config_data).errors)
+        if write_warning:
+            warnings.append(write_warning)
+        if warnings:
+            result["warnings"] = warnings
+        return result
+
     except json.JSONDecodeError as e:
         return {"success": False, "error": f"Invalid JSON format: {str(e)}"}
     except Exception as e:
@@ -28,11 +186,12 @@ def save_device_config(device_id, config_data):
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
-        print(json.dumps({"success": False, "error": "Usage: save_config.py <device_id> <config_json>"}))
+        print(json.dumps({"success": False, "error": "Usage: save_config.py <device_id> <config_json | ->"}))
         sys.exit(1)
-    
+
     device_id = sys.argv[1]
-    config_json = sys.argv[2]
-    
+    # '-' reads the config from stdin, for configs too large for the command line
+    config_json = sys.stdin.read() if sys.argv[2] == '-' else sys.argv[2]
+
     result = save_device_config(device_id, config_json)
-    print(json.dumps(result))
\ No newline at end of file
+    print(json.dumps(result))
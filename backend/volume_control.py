@@ -0,0 +1,229 @@
+"""
+Volume control for Stream Deck backend.
+Sets the system volume from the analog knob. Knob positions are coalesced
+into the latest target and applied at a bounded rate through a mixer
+backend, so a fast turn never queues up stale volume calls.
+
+Mixer backends:
+    pycaw - Windows master volume through the Core Audio API
+    fake  - In-memory mixer for tests and benchmarks, on any platform
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+VOLUME_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'volume_config.json')
+
+DEFAULT_BACKEND = 'auto'  # pycaw on Windows, fake elsewhere
+DEFAULT_MAX_RATE = 30  # Volume changes applied per second at most
+
+
+class PycawMixer:
+    """
+    Windows master volume through pycaw.
+
+    pycaw and comtypes are imported when the mixer is created, so the
+    backend loads on platforms without them. COM is initialized on the
+    thread that makes the first call, which VolumeEngine keeps the same.
+    """
+
+    name = 'pycaw'
+
+    def __init__(self):
+        import comtypes
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+        self.comtypes = comtypes
+        self.audio_utilities = AudioUtilities
+        self.interface = IAudioEndpointVolume
+        self.endpoint = None
+        self.thread = None
+
+    def volume(self):
+        """Endpoint volume interface of the default speakers, created on the calling thread"""
+        if self.endpoint is None or self.thread != threading.get_ident():
+            self.comtypes.CoInitialize()
+            speakers = self.audio_utilities.GetSpeakers()
+            interface = speakers.Activate(self.interface._iid_, self.comtypes.CLSCTX_ALL, None)
+            self.endpoint = interface.QueryInterface(self.interface)
+            self.thread = threading.get_ident()
+        return self.endpoint
+
+    def get_level(self) -> float:
+        return self.volume().GetMasterVolumeLevelScalar()
+
+    def set_level(self, level: float):
+        self.volume().SetMasterVolumeLevelScalar(level, None)
+
+
+class FakeMixer:
+    """
+    In-memory mixer that records every call.
+
+    latency makes each set_level block like a slow audio API would.
+
+    Example usage:
+        mixer = FakeMixer(latency=0.005)
+        engine = VolumeEngine(mixer)
+    """
+
+    name = 'fake'
+
+    def __init__(self, level: float = 0.5, latency: float = 0.0):
+        self.level = level
+        self.latency = latency
+        self.calls = []  # (time.perf_counter(), level) of every set_level
+
+    def get_level(self) -> float:
+        return self.level
+
+    def set_level(self, level: float):
+        if self.latency:
+            time.sleep(self.latency)
+        self.level = level
+        self.calls.append((time.perf_counter(), level))
+
+
+MIXERS = {
+    'pycaw': PycawMixer,
+    'fake': FakeMixer,
+}
+
+
+def load_volume_config(path: str = VOLUME_CONFIG) -> dict:
+    """Read volume_config.json, using defaults for a missing or invalid file"""
+    config = {"backend": DEFAULT_BACKEND, "maxRate": DEFAULT_MAX_RATE}
+    try:
+        with open(path, 'r') as f:
+            loaded = json.load(f)
+        if isinstance(loaded, dict):
+            config.update(loaded)
+    except (OSError, json.JSONDecodeError):
+        pass
+    return config
+
+
+def create_mixer(backend: str = DEFAULT_BACKEND):
+    """Create a mixer backend by name; 'auto' picks pycaw on Windows and fake elsewhere"""
+    if backend == 'auto':
+        backend = 'pycaw' if sys.platform == 'win32' else 'fake'
+    if backend not in MIXERS:
+        raise ValueError(f"Unknown volume backend: {backend}")
+    return MIXERS[backend]()
+
+
+class VolumeEngine:
+    """
+    Coalescing, rate limited volume setter.
+
+    set_level() only records the newest target. One mixer call runs at a
+    time on a dedicated thread, at most max_rate per second; when it
+    finishes, the latest target (if it changed) is applied next and every
+    position in between is dropped. A burst of knob updates therefore costs
+    a few mixer calls and always ends on the last position.
+
+    Example usage:
+        engine = VolumeEngine(FakeMixer())
+        engine.set_level(0.75)
+    """
+
+    def __init__(self, mixer, max_rate: float = DEFAULT_MAX_RATE, loop=None):
+        self.mixer = mixer
+        self.interval = 1 / max_rate if max_rate else 0.0
+        self.loop = loop or asyncio.get_running_loop()
+        # One thread, so calls never overlap and COM stays on the thread it was set up on
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='volume')
+        self.target = None  # Newest level not yet handed to the mixer
+        self.level = None  # Last level applied
+        self.applying = False
+        self.next_apply = 0.0
+        self.timer = None
+        self.requests = 0
+        self.applied = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.last_error = None
+        self.last_call_ms = None
+
+    @classmethod
+    def from_config(cls, config=None, loop=None):
+        """Create an engine with the mixer and rate from volume_config.json"""
+        config = config if config is not None else load_volume_config()
+        max_rate = config.get('maxRate', DEFAULT_MAX_RATE)
+        if not isinstance(max_rate, (int, float)) or isinstance(max_rate, bool) or max_rate < 0:
+            max_rate = DEFAULT_MAX_RATE
+        return cls(create_mixer(config.get('backend', DEFAULT_BACKEND)), max_rate, loop)
+
+    def set_level(self, level: float):
+        """Make level (0.0 to 1.0) the volume to apply next"""
+        self.requests += 1
+        if self.target is not None:
+            # Replaced before it reached the mixer
+            self.coalesced += 1
+        self.target = min(max(level, 0.0), 1.0)
+        self.kick()
+
+    def kick(self):
+        """Start applying the target if no call is running and the rate allows it"""
+        if self.applying or self.timer is not None or self.target is None:
+            return
+
+        now = self.loop.time()
+        if now < self.next_apply:
+            self.timer = self.loop.call_at(self.next_apply, self.on_timer)
+            return
+
+        level, self.target = self.target, None
+        if level == self.level:
+            return
+        self.applying = True
+        self.next_apply = now + self.interval
+        self.loop.create_task(self.apply(level))
+
+    def on_timer(self):
+        self.timer = None
+        self.kick()
+
+    async def apply(self, level: float):
+        started = time.perf_counter()
+        try:
+            await self.loop.run_in_executor(self.pool, self.mixer.set_level, level)
+            self.level = level
+            self.applied += 1
+        except Exception as e:
+            self.failed += 1
+            self.last_error = str(e)
+        finally:
+            self.last_call_ms = round((time.perf_counter() - started) * 1000, 3)
+            self.applying = False
+            self.kick()
+
+    @property
+    def idle(self) -> bool:
+        """True when nothing is pending, waiting on the rate limit or being applied"""
+        return self.target is None and self.timer is None and not self.applying
+
+    def close(self):
+        """Drop the pending target and stop the mixer thread once its call returns"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        self.target = None
+        self.pool.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.mixer.name,
+            "requests": self.requests,
+            "applied": self.applied,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "level": self.level,
+            "last_call_ms": self.last_call_ms,
+            "last_error": self.last_error,
+        }
@@ -29,6 +29,14 @@ int currentGPIOStates[NUM_GPIOS];
 int previousGPIOStates[NUM_GPIOS];
 bool hasChanges = false;
 
+// Binary frame format (see backend/gpio_frame.py), enabled when the client asks for it
+#define FRAME_MARKER 0xD5
+#define FRAME_VERSION 1
+#define FRAME_SIZE 10
+#define ANALOG_INDEX 0  // Index of D15 in gpioPins
+bool useBinaryFrames = false;
+uint16_t frameSeq = 0;
+
 #define SERVICE_UUID        "4fafc201-1fb5-459e-8fcc-c5c9c331914b"
 #define CHARACTERISTIC_UUID "beb5483e-36e1-4688-b7f5-ea07361b26a8"
 
@@ -43,6 +51,7 @@ class MyServerCallbacks: public BLEServerCallbacks {
     void onDisconnect(BLEServer* pServer) {
       deviceConnected = false;
       isClientAuthorized = false;
+      useBinaryFrames = false;
       Serial.println("Device disconnected");
       // Restart advertising to allow reconnection
       delay(500); // Wait a bit before restarting
@@ -92,6 +101,8 @@ class MyCharacteristicCallbacks: public BLECharacteristicCallbacks {
               if (storedUUID == clientUUID || storedUUID == "") {
                 deviceUUID = clientUUID;
                 isClientAuthorized = true;
+                // Newer clients request the compact binary GPIO frame
+                useBinaryFrames = doc["format"] == "binary";
                 Serial.println("Client authorized: " + clientUUID);
               } else {
                 Serial.println("Unauthorized client: " + clientUUID);
@@ -189,9 +200,46 @@ void updatePreviousStates() {
   }
 }
 
+void sendBinaryGPIOData(bool isVerify, bool isKeepAlive) {
+  uint16_t buttons = 0;
+  for (int i = 0; i < NUM_GPIOS; i++) {
+    if (i == ANALOG_INDEX) continue;
+    // Other ADC pins count as pressed above half scale
+    bool pressed = (gpioPins[i] >= 32 && gpioPins[i] <= 39)
+      ? currentGPIOStates[i] > 2048
+      : currentGPIOStates[i] != 0;
+    if (pressed) buttons |= (1 << i);
+  }
+  uint16_t analog = (uint16_t)currentGPIOStates[ANALOG_INDEX];
+  
+  uint8_t frame[FRAME_SIZE];
+  frame[0] = FRAME_MARKER;
+  frame[1] = FRAME_VERSION;
+  frame[2] = isVerify ? 1 : (isKeepAlive ? 2 : 0);
+  frame[3] = ANALOG_INDEX;
+  frame[4] = frameSeq & 0xFF;
+  frame[5] = frameSeq >> 8;
+  frame[6] = buttons & 0xFF;
+  frame[7] = buttons >> 8;
+  frame[8] = analog & 0xFF;
+  frame[9] = analog >> 8;
+  frameSeq++;
+  
+  pCharacteristic->setValue(frame, FRAME_SIZE);
+  pCharacteristic->notify();
+}
+
 void sendGPIOData(bool isVerify = false, bool isKeepAlive = false, bool forceData = false) {
   if (!deviceConnected || !isClientAuthorized) return;
   
+  if (useBinaryFrames) {
+    sendBinaryGPIOData(isVerify, isKeepAlive);
+    if (hasChanges && !isVerify) {
+      updatePreviousStates();
+    }
+    return;
+  }
+  
   StaticJsonDocument<1024> doc;
   doc["device_id"] = DEVICE_ID;
   doc["device_uuid"] = BLEDevice::getAddress().toString();